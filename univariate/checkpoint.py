@@ -0,0 +1,85 @@
+import numpy as np
+
+import os
+import time
+import tempfile
+from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+# Prefix of the keys of the run parameters in the `.npz` file, so that they cannot clash with the state
+_PARAMETER_PREFIX = "parameter_"
+
+
+@dataclass
+class OptimizerCheckpoint:
+    """Atomic, rate-limited `.npz` checkpoints of an optimizer of `VoronoiQuantization1D`, from which it resumes.
+
+    :param path: checkpoint file, resumed from if it exists (with the same run parameters, otherwise ValueError)
+    :param min_interval: minimum number of seconds between two writes
+    """
+
+    path: str
+    min_interval: float = 60.0
+
+    last_save: float = field(init=False, default_factory=time.monotonic)
+
+    def load(
+        self,
+        method: str,
+        parameters: Dict[str, Any],
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Load the state stored by `method`, or return None if there is no checkpoint yet.
+
+        :param method: name of the optimizer that wrote the checkpoint
+        :param parameters: parameters of the run, which must match the stored ones
+        :return: dictionary of arrays
+        """
+        if not os.path.exists(self.path):
+            return None
+        with np.load(self.path) as data:
+            state = {key: data[key] for key in data.files}
+        stored_method = str(state.pop("method"))
+        if stored_method != method:
+            raise ValueError(f"Checkpoint {self.path} was written by {stored_method}, not by {method}")
+        for name, value in parameters.items():
+            stored_value = state.pop(_PARAMETER_PREFIX + name, None)
+            stored_value = None if stored_value is None else stored_value.item()
+            if stored_value != np.asarray(value).item():
+                raise ValueError(f"Checkpoint {self.path} was written with {name}={stored_value}, not {name}={value}")
+        logger.info(
+            "Resuming {} from checkpoint {} (iteration={}, history_offset={})",
+            method,
+            self.path,
+            int(state["iteration"]),
+            len(state["distortions"]),
+        )
+        return state
+
+    def due(self) -> bool:
+        """Whether at least `min_interval` seconds have elapsed since the last write."""
+        return time.monotonic() - self.last_save >= self.min_interval
+
+    def save(
+        self,
+        method: str,
+        parameters: Dict[str, Any],
+        **state: np.ndarray,
+    ) -> None:
+        """Atomically write the state of `method` along with the parameters of the run."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                stored_parameters = {_PARAMETER_PREFIX + name: value for name, value in parameters.items()}
+                np.savez(f, method=method, **stored_parameters, **state)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.last_save = time.monotonic()
+        logger.debug("Checkpoint of {} written to {} (iteration={})", method, self.path, int(state["iteration"]))
@@ -0,0 +1,62 @@
+import scipy
+import numpy as np
+
+from typing import Tuple
+from dataclasses import dataclass
+
+# Damping terms D of the Levenberg-Marquardt matrices H + lambda D studied by `hessian_conditioning`
+DAMPING_TYPES = ("identity", "diagonal", "hessian")
+
+
+@dataclass(frozen=True)
+class HessianConditioning:
+    """Spectral quantities of the damped Hessians $H + \\lambda D$ over an (iteration x lambda x damping type) grid.
+
+    Every array has shape (number of quantizers, number of lambdas, number of damping types). As in the conditioning
+    notebook, `condition_number` is $|\\lambda_{\\max}| / |\\lambda_{\\min}|$ for the smallest and largest eigenvalues,
+    and `effective_rank` is the exponential of the spectral entropy of the absolute eigenvalues (NaN when it was not
+    requested).
+    """
+
+    lambdas: np.ndarray
+    damping_types: Tuple[str, ...]
+    eigenvalue_min: np.ndarray
+    eigenvalue_max: np.ndarray
+    condition_number: np.ndarray
+    spectral_entropy: np.ndarray
+    effective_rank: np.ndarray
+
+
+def condition_number(eigenvalue_min: np.ndarray, eigenvalue_max: np.ndarray) -> np.ndarray:
+    abs_min, abs_max = np.abs(eigenvalue_min), np.abs(eigenvalue_max)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((abs_min == 0.0) | ~np.isfinite(abs_min), np.inf, abs_max / abs_min)
+
+
+def spectral_entropy(eigenvalues: np.ndarray) -> np.ndarray:
+    """Spectral entropy (in nats) of the absolute eigenvalues along the last axis, NaN for a zero or infinite sum."""
+    weights = np.abs(eigenvalues)
+    total = weights.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = weights / total
+        terms = np.where(p > 0.0, -p * np.log(np.where(p > 0.0, p, 1.0)), 0.0)
+    entropy = terms.sum(axis=-1)
+    return np.where((total[..., 0] == 0.0) | ~np.isfinite(total[..., 0]), np.nan, entropy)
+
+
+def tridiagonal_spectrum(
+    diagonal: np.ndarray,
+    off_diagonal: np.ndarray,
+    full: bool,
+) -> Tuple[float, float, np.ndarray]:
+    """Smallest and largest eigenvalues of a symmetric tridiagonal matrix, and its whole (sorted) spectrum if `full`.
+
+    The extreme eigenvalues alone are found by bisection on Sturm sequences, in O(N) memory and time per eigenvalue.
+    """
+    if full:
+        spectrum = scipy.linalg.eigvalsh_tridiagonal(diagonal, off_diagonal)
+        return spectrum[0], spectrum[-1], spectrum
+    last = len(diagonal) - 1
+    low = scipy.linalg.eigvalsh_tridiagonal(diagonal, off_diagonal, select="i", select_range=(0, 0))[0]
+    high = scipy.linalg.eigvalsh_tridiagonal(diagonal, off_diagonal, select="i", select_range=(last, last))[0]
+    return low, high, None
@@ -1,21 +1,38 @@
 import os
 import csv
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
-import imageio
+import bokeh
+import numpy as np
+import imageio.v2 as imageio
 
 from bokeh.io import export_svg, export_png
 from bokeh.models import ColumnDataSource
 from bokeh.palettes import Category10, Viridis
 from bokeh.plotting import figure, show
 
+from univariate.traces import load_trace
+
 mfclvq_color = Viridis[3][1]
 lloyd_color = Viridis[3][2]
 nr_color = Viridis[3][0]
 nrlm_color = Category10[10][3]
 general_font_size = "14pt"
+figure_width = 900
+figure_height = 500
+frames_manifest_name = "frames.json"
+# To be incremented on any change of the drawing code (make_figure, draw_series, render_frame): the frames are then
+# rendered again, their digests including it along with the styling parameters above
+frame_render_version = 1
 
 
 def get_distortion_from_file(file_path: str):
+    if file_path.endswith(".qtrace"):
+        # Binary traces are memory-mapped, each record can be indexed as a (step, distortion, ...) row
+        trace = load_trace(file_path)
+        return trace, len(trace) + 1
     with open(file_path, "r") as f_distortion:
         distortion_per_step = csv.reader(f_distortion, delimiter=";")
         to_return = []
@@ -24,174 +41,157 @@ def get_distortion_from_file(file_path: str):
     return to_return[1:], len(to_return)
 
 
-def make_plot_distortion(file_path: str, plot, line_color, fill_color, should_save, nbr_step_max_to_print):
-    distortion_per_step, number_row = get_distortion_from_file(file_path)
-    file_name = file_path.split("/")[-1]
-    distri_name = file_name.split("_")[0]
-    method_name = file_name.split("_")[1]
-    step = list()
-    disto = list()
-    source = ColumnDataSource(data=dict(step=step, disto=disto))
-    plot.circle(
-        x="step", y="disto", source=source, fill_color=fill_color, line_color=line_color, legend_label=method_name
-    )
-    plot.line(x="step", y="disto", source=source, line_color=line_color, legend_label=method_name)
-    for i, row in enumerate(distortion_per_step):
-        print(f"{method_name}: {i+1}/{number_row-1}")
-        if i >= nbr_step_max_to_print:
-            break
-        step.append(int(row[0]))
-        disto.append(float(row[1]))
-        if should_save:
-            dir_path = os.path.join("plots", distri_name, method_name)
-            if not os.path.isdir(dir_path):
-                os.makedirs(dir_path)
-            export_png(plot, filename=os.path.join(dir_path, f"{step[-1]}.png"))
-    return plot
-
-
-def extract_step_number_from_filename(filename):
-    return int(filename[: filename.rfind(".")])
-
-
-def make_gif(directories, output_dir):
-    images = []
-    for directory in directories:
-        filenames = [filename for filename in os.listdir(directory) if filename.endswith(".png")]
-        filenames.sort(key=extract_step_number_from_filename)
-
-        for filename in filenames:
-            images.append(imageio.imread(os.path.join(directory, filename)))
+def get_series_from_file(file_path: str, nbr_step_max_to_print: int):
+    # Steps and distortions of the first `nbr_step_max_to_print` rows, converted at once
+    if file_path.endswith(".qtrace"):
+        # The columns of a binary trace are sliced directly from the memory map, without a loop over the records
+        trace = load_trace(file_path)
+        return trace["step"][:nbr_step_max_to_print].astype(float), trace["distortion"][:nbr_step_max_to_print]
+    distortion_per_step, _ = get_distortion_from_file(file_path)
+    rows = np.array([(row[0], row[1]) for row in distortion_per_step[:nbr_step_max_to_print]], dtype=float)
+    rows = rows.reshape(-1, 2)
+    return rows[:, 0], rows[:, 1]
 
-    gif_name = "distortion_convergence.gif"
-    imageio.mimsave(os.path.join(output_dir, gif_name), images)
 
+def make_figure(title: str = None):
+    plot = figure(width=figure_width, height=figure_height)
 
-def prepare_and_make_gif_normal_distrib():
-    plot = figure(plot_width=900, plot_height=500)
+    if title is not None:
+        plot.title = title
+        plot.title.text_font_size = general_font_size
 
     plot.xaxis.axis_label = "Number of iterations"
     plot.xaxis.axis_label_text_font_size = general_font_size
 
     plot.yaxis.axis_label = "Distortion"
     plot.yaxis.axis_label_text_font_size = general_font_size
+    return plot
 
-    plot.legend.text_font_size = general_font_size
 
-    plot = make_plot_distortion(
-        "distortions/normal_mfclvq_10.txt",
-        plot,
-        fill_color=None,
-        line_color=mfclvq_color,
-        should_save=True,
-        nbr_step_max_to_print=50,
-    )
-    plot = make_plot_distortion(
-        "distortions/normal_lloyd_10.txt",
-        plot,
-        fill_color=None,
-        line_color=lloyd_color,
-        should_save=True,
-        nbr_step_max_to_print=50,
-    )
-    plot = make_plot_distortion(
-        "distortions/normal_nr_10.txt",
-        plot,
-        fill_color=nr_color,
-        line_color=nr_color,
-        should_save=True,
-        nbr_step_max_to_print=50,
+def draw_series(plot, series):
+    legend_label, step, disto, line_color, fill_color = series
+    source = ColumnDataSource(data=dict(step=step, disto=disto))
+    plot.scatter(
+        x="step", y="disto", source=source, fill_color=fill_color, line_color=line_color, legend_label=legend_label
     )
-    make_gif(["plots/normal/mfclvq", "plots/normal/lloyd", "plots/normal/nr"], output_dir="plots/normal")
+    plot.line(x="step", y="disto", source=source, line_color=line_color, legend_label=legend_label)
 
 
-def prepare_and_make_gif_normal_distrib_v2():
-    dir_path = os.path.join("plots", "normal", "all")
-    if not os.path.isdir(dir_path):
-        os.makedirs(dir_path)
-
-    plot = figure(plot_width=900, plot_height=500)
-
-    plot.xaxis.axis_label = "Number of iterations"
-    plot.xaxis.axis_label_text_font_size = general_font_size
-
-    plot.yaxis.axis_label = "Distortion"
-    plot.yaxis.axis_label_text_font_size = general_font_size
-
-    distortion_per_step_mfclvq, number_row_mfclvq = get_distortion_from_file("distortions/normal_mfclvq_10.txt")
-    distortion_per_step_lloyd, number_row_lloyd = get_distortion_from_file("distortions/normal_lloyd_10.txt")
-    distortion_per_step_nr, number_row_nr = get_distortion_from_file("distortions/normal_nr_10.txt")
-
-    step_mfclvq = list()
-    disto_mfclvq = list()
-    step_lloyd = list()
-    disto_lloyd = list()
-    step_nr = list()
-    disto_nr = list()
-
-    source = ColumnDataSource(
-        data=dict(
-            step_mfclvq=step_mfclvq,
-            disto_mfclvq=disto_mfclvq,
-            step_lloyd=step_lloyd,
-            disto_lloyd=disto_lloyd,
-            step_nr=step_nr,
-            disto_nr=disto_nr,
-        )
-    )
+def make_plot_distortion(file_path: str, plot, line_color, fill_color, nbr_step_max_to_print):
+    file_name = file_path.split("/")[-1]
+    method_name = file_name.split("_")[1]
+    step, disto = get_series_from_file(file_path, nbr_step_max_to_print)
+    draw_series(plot, (method_name, step, disto, line_color, fill_color))
+    plot.legend.label_text_font_size = general_font_size
+    return plot
 
-    plot.circle(
-        x="step_mfclvq",
-        y="disto_mfclvq",
-        source=source,
-        fill_color=None,
-        line_color=mfclvq_color,
-        legend_label="mfclvq",
-    )
-    plot.line(x="step_mfclvq", y="disto_mfclvq", source=source, line_color=mfclvq_color, legend_label="mfclvq")
 
-    plot.circle(
-        x="step_lloyd", y="disto_lloyd", source=source, fill_color=None, line_color=lloyd_color, legend_label="lloyd"
-    )
-    plot.line(x="step_lloyd", y="disto_lloyd", source=source, line_color=lloyd_color, legend_label="lloyd")
+def render_frame(frame):
+    # Each frame is drawn from scratch on its own figure, so frames are independent and can be rendered by any worker
+    file_path, all_series = frame
+    plot = make_figure()
+    for series in all_series:
+        draw_series(plot, series)
+    plot.legend.label_text_font_size = general_font_size
+    export_png(plot, filename=file_path)
+    return file_path
 
-    plot.circle(
-        x="step_nr", y="disto_nr", source=source, fill_color=nr_color, line_color=nr_color, legend_label="disto_nr"
-    )
-    plot.line(x="step_nr", y="disto_nr", source=source, line_color=nr_color, legend_label="disto_nr")
 
-    for i, (row_mfclvq, row_lloyd, row_nr) in enumerate(
-        zip(distortion_per_step_mfclvq, distortion_per_step_lloyd, distortion_per_step_nr)
-    ):
-        if i >= 75:
-            break
-        step_mfclvq.append(int(row_mfclvq[0]))
-        disto_mfclvq.append(float(row_mfclvq[1]))
+def frame_digest(all_series) -> str:
+    digest = hashlib.sha256(bokeh.__version__.encode())
+    digest.update(repr((frame_render_version, figure_width, figure_height, general_font_size)).encode())
+    for legend_label, step, disto, line_color, fill_color in all_series:
+        digest.update(repr((legend_label, line_color, fill_color)).encode())
+        digest.update(np.ascontiguousarray(step, dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(disto, dtype=float).tobytes())
+    return digest.hexdigest()
 
-        step_lloyd.append(float(row_lloyd[0]))
-        disto_lloyd.append(float(row_lloyd[1]))
 
-        step_nr.append(float(row_nr[0]))
-        disto_nr.append(float(row_nr[1]))
+def render_frames(dir_path: str, frames, max_workers: int = None):
+    """Render the frames (file name, list of (legend, steps, distortions, line color, fill color)) of an animation.
 
-        export_png(plot, filename=os.path.join(dir_path, f"{step_mfclvq[-1]}.png"))
+    A manifest in `dir_path` stores the digest of the content of each frame: frames whose PNG already exists with the
+    same content are not rendered again. The other ones are rendered in parallel by worker processes.
+    Return the paths of the frames, in order.
+    """
+    if not os.path.isdir(dir_path):
+        os.makedirs(dir_path)
+    manifest_path = os.path.join(dir_path, frames_manifest_name)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f_manifest:
+            manifest = json.load(f_manifest)
+
+    file_paths, to_render, new_manifest = [], [], {}
+    for file_name, all_series in frames:
+        file_path = os.path.join(dir_path, file_name)
+        new_manifest[file_name] = frame_digest(all_series)
+        if manifest.get(file_name) != new_manifest[file_name] or not os.path.exists(file_path):
+            to_render.append((file_path, all_series))
+        file_paths.append(file_path)
+
+    print(f"{dir_path}: {len(to_render)}/{len(frames)} frames to render")
+    if to_render:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for i, file_path in enumerate(pool.map(render_frame, to_render), start=1):
+                print(f"{dir_path}: {i}/{len(to_render)}")
+
+    with open(manifest_path, "w") as f_manifest:
+        json.dump(new_manifest, f_manifest, indent=1)
+    return file_paths
+
+
+def make_gif(file_paths, output_path):
+    # Frames are streamed into the writer one at a time instead of being all loaded in memory
+    with imageio.get_writer(output_path, mode="I") as writer:
+        for file_path in file_paths:
+            writer.append_data(imageio.imread(file_path))
+
+
+def prepare_and_make_gif_normal_distrib(max_workers: int = None):
+    methods = [
+        ("mfclvq", None, mfclvq_color),
+        ("lloyd", None, lloyd_color),
+        ("nr", nr_color, nr_color),
+    ]
+    full_series = []
+    file_paths = []
+    for method_name, fill_color, line_color in methods:
+        step, disto = get_series_from_file(f"distortions/normal_{method_name}_10.txt", nbr_step_max_to_print=50)
+        # The methods are animated one after the other, the previous ones being fully drawn
+        frames = [
+            (f"{int(step[k - 1])}.png", full_series + [(method_name, step[:k], disto[:k], line_color, fill_color)])
+            for k in range(1, len(step) + 1)
+        ]
+        file_paths += render_frames(os.path.join("plots", "normal", method_name), frames, max_workers=max_workers)
+        full_series.append((method_name, step, disto, line_color, fill_color))
+    make_gif(file_paths, output_path=os.path.join("plots", "normal", "distortion_convergence.gif"))
+
+
+def prepare_and_make_gif_normal_distrib_v2(max_workers: int = None):
+    dir_path = os.path.join("plots", "normal", "all")
 
-    make_gif([dir_path], output_dir=dir_path)
+    step_mfclvq, disto_mfclvq = get_series_from_file("distortions/normal_mfclvq_10.txt", nbr_step_max_to_print=75)
+    step_lloyd, disto_lloyd = get_series_from_file("distortions/normal_lloyd_10.txt", nbr_step_max_to_print=75)
+    step_nr, disto_nr = get_series_from_file("distortions/normal_nr_10.txt", nbr_step_max_to_print=75)
+
+    frames = [
+        (
+            f"{int(step_mfclvq[k - 1])}.png",
+            [
+                ("mfclvq", step_mfclvq[:k], disto_mfclvq[:k], mfclvq_color, None),
+                ("lloyd", step_lloyd[:k], disto_lloyd[:k], lloyd_color, None),
+                ("disto_nr", step_nr[:k], disto_nr[:k], nr_color, nr_color),
+            ],
+        )
+        for k in range(1, min(len(step_mfclvq), len(step_lloyd), len(step_nr)) + 1)
+    ]
+    file_paths = render_frames(dir_path, frames, max_workers=max_workers)
+    make_gif(file_paths, output_path=os.path.join(dir_path, "distortion_convergence.gif"))
 
 
 def save_graph_comparison_convergence_methods(title, distrib, N, methods=["mfclvq", "lloyd", "nr"], format="png"):
-    plot = figure(plot_width=900, plot_height=500)
-
-    plot.title = title
-    plot.title.text_font_size = general_font_size
-
-    plot.xaxis.axis_label = "Number of iterations"
-    plot.xaxis.axis_label_text_font_size = general_font_size
-
-    plot.yaxis.axis_label = "Distortion"
-    plot.yaxis.axis_label_text_font_size = general_font_size
-
-    plot.legend.text_font_size = general_font_size
+    plot = make_figure(title)
 
     if "mfclvq" in methods:
         plot = make_plot_distortion(
@@ -199,7 +199,6 @@ def save_graph_comparison_convergence_methods(title, distrib, N, methods=["mfclv
             plot,
             fill_color=None,
             line_color=mfclvq_color,
-            should_save=False,
             nbr_step_max_to_print=100,
         )
     if "lloyd" in methods:
@@ -208,7 +207,6 @@ def save_graph_comparison_convergence_methods(title, distrib, N, methods=["mfclv
             plot,
             fill_color=None,
             line_color=lloyd_color,
-            should_save=False,
             nbr_step_max_to_print=100,
         )
     if "nr" in methods:
@@ -217,7 +215,6 @@ def save_graph_comparison_convergence_methods(title, distrib, N, methods=["mfclv
             plot,
             fill_color=nr_color,
             line_color=nr_color,
-            should_save=False,
             nbr_step_max_to_print=100,
         )
     if "nrlm" in methods:
@@ -226,7 +223,6 @@ def save_graph_comparison_convergence_methods(title, distrib, N, methods=["mfclv
             plot,
             fill_color=nrlm_color,
             line_color=nrlm_color,
-            should_save=False,
             nbr_step_max_to_print=100,
         )
     if format == "png":
@@ -235,28 +231,33 @@ def save_graph_comparison_convergence_methods(title, distrib, N, methods=["mfclv
         export_svg(plot, filename=os.path.join("plots", f"{distrib}_{N}.svg"))
 
 
-prepare_and_make_gif_normal_distrib_v2()
-
-save_graph_comparison_convergence_methods(
-    "Normal distribution quantization with N=10", "normal", 10, methods=["mfclvq", "lloyd", "nr"], format="svg"
-)
-save_graph_comparison_convergence_methods(
-    "Log-normal distribution quantization with N=10", "lognormal", 10, methods=["mfclvq", "lloyd", "nr"], format="svg"
-)
-save_graph_comparison_convergence_methods(
-    "Exponential distribution quantization with N=10",
-    "exponential",
-    10,
-    methods=["mfclvq", "lloyd", "nr"],
-    format="svg",
-)
-
-save_graph_comparison_convergence_methods(
-    "Normal distribution quantization with N=50", "normal", 50, methods=["mfclvq", "lloyd"], format="svg"
-)
-save_graph_comparison_convergence_methods(
-    "Log-normal distribution quantization with N=50", "lognormal", 50, methods=["mfclvq", "lloyd"], format="svg"
-)
-save_graph_comparison_convergence_methods(
-    "Exponential distribution quantization with N=50", "exponential", 50, methods=["mfclvq", "lloyd"], format="svg"
-)
+if __name__ == "__main__":
+    prepare_and_make_gif_normal_distrib_v2()
+
+    save_graph_comparison_convergence_methods(
+        "Normal distribution quantization with N=10", "normal", 10, methods=["mfclvq", "lloyd", "nr"], format="svg"
+    )
+    save_graph_comparison_convergence_methods(
+        "Log-normal distribution quantization with N=10",
+        "lognormal",
+        10,
+        methods=["mfclvq", "lloyd", "nr"],
+        format="svg",
+    )
+    save_graph_comparison_convergence_methods(
+        "Exponential distribution quantization with N=10",
+        "exponential",
+        10,
+        methods=["mfclvq", "lloyd", "nr"],
+        format="svg",
+    )
+
+    save_graph_comparison_convergence_methods(
+        "Normal distribution quantization with N=50", "normal", 50, methods=["mfclvq", "lloyd"], format="svg"
+    )
+    save_graph_comparison_convergence_methods(
+        "Log-normal distribution quantization with N=50", "lognormal", 50, methods=["mfclvq", "lloyd"], format="svg"
+    )
+    save_graph_comparison_convergence_methods(
+        "Exponential distribution quantization with N=50", "exponential", 50, methods=["mfclvq", "lloyd"], format="svg"
+    )
@@ -1,9 +1,14 @@
 import numpy as np
 import argparse
+from functools import partial
 
+from univariate.checkpoint import OptimizerCheckpoint
 from univariate.exponential_quantization import ExponentialVoronoiQuantization
 from univariate.lognormal_quantization import LogNormalVoronoiQuantization
+from univariate.mixture_quantization import LogNormalMixtureVoronoiQuantization, NormalMixtureVoronoiQuantization
+from univariate.multi_start import multi_start_search
 from univariate.normal_quantization import NormalVoronoiQuantization
+from univariate.traces import TraceWriter
 from univariate.uniform_quantization import UniformVoronoiQuantization
 
 np.set_printoptions(precision=5)
@@ -26,6 +31,9 @@ if __name__ == "__main__":
         "lognormal": LogNormalVoronoiQuantization,
         "uniform": UniformVoronoiQuantization,
         "exponential": ExponentialVoronoiQuantization,
+        # Bimodal laws, whose distortion has several local minima (see --nbr-starts)
+        "normal-mixture": partial(NormalMixtureVoronoiQuantization, [0.5, 0.5], [-4.0, 4.0], [0.3, 1.0]),
+        "lognormal-mixture": partial(LogNormalMixtureVoronoiQuantization, [0.7, 0.3], [0.0, 2.0], [0.25, 0.1]),
     }
 
     random_sampling = {
@@ -41,7 +49,7 @@ if __name__ == "__main__":
         "-d",
         "--distribution",
         type=str,
-        choices=["normal", "lognormal", "uniform", "exponential"],
+        choices=list(quantizers),
         help="Distribution of the quantizer to build",
         required=True,
     )
@@ -49,13 +57,40 @@ if __name__ == "__main__":
         "-m",
         "--method",
         type=str,
-        choices=["lloyd", "mfclvq", "nr", "nrlm"],
-        help="Optimization method (`mfclvq` = mean field CLVQ, `nr` = Newton–Raphson, `nrlm` = NR with Levenberg–Marquardt)",
+        choices=["lloyd", "mfclvq", "nr", "nrlm", "lbfgs"],
+        help=(
+            "Optimization method (`mfclvq` = mean field CLVQ, `nr` = Newton–Raphson, "
+            "`nrlm` = NR with Levenberg–Marquardt, `lbfgs` = L-BFGS preconditioned by the cells probabilities)"
+        ),
         required=True,
     )
     parser.add_argument(
         "-n", "--nbr_iter", type=int, help="Number of iteration to apply of the optimization method", required=True
     )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        help="Path of a checkpoint file, written periodically and used to resume the optimization if it exists",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=60.0,
+        help="Minimum number of seconds between two checkpoint writes",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Path of a binary trace (.qtrace) to which the history of the optimization is appended",
+    )
+    parser.add_argument(
+        "--nbr-starts",
+        type=int,
+        default=1,
+        help="Number of initializations of a parallel multi-start search (a single random start by default), "
+        "incompatible with --checkpoint and --trace",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the initializations of the multi-start search")
     parser.add_argument(
         "--print-distortions",
         action="store_true",
@@ -63,17 +98,51 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
+    if args.nbr_starts > 1 and (args.checkpoint is not None or args.trace is not None):
+        # Each start runs its own optimizers, there is no single run to checkpoint or trace
+        parser.error("--checkpoint and --trace cannot be used with a multi-start search (--nbr-starts > 1)")
 
     quantization = quantizers.get(args.distribution)()
 
-    centroids = random_sampling.get(args.distribution)(size=args.size)
     optimizers = {
         "lloyd": quantization.deterministic_lloyd_method,
         "mfclvq": quantization.mean_field_clvq_method,
         "nr": quantization.newton_raphson_method,
         "nrlm": quantization.newton_raphson_method_with_levenberg_marquardt,
+        "lbfgs": quantization.lbfgs_method,
     }
-    centroids, probas, distortions = optimizers.get(args.method)(centroids, args.nbr_iter)
+    checkpoint = None
+    if args.checkpoint is not None:
+        checkpoint = OptimizerCheckpoint(args.checkpoint, min_interval=args.checkpoint_interval)
+    if args.nbr_starts > 1:
+        try:
+            result = multi_start_search(
+                quantization,
+                args.size,
+                nbr_starts=args.nbr_starts,
+                nbr_iterations=args.nbr_iter,
+                method=args.method,
+                seed=args.seed,
+            )
+        except ValueError as e:
+            # e.g. a number of iterations not larger than the Lloyd warmup of nr and nrlm
+            parser.error(str(e))
+        centroids, probas, distortions = result.centroids, result.probabilities, result.distortions
+        print(f"minima     : {np.sort(result.minima[result.nbr_rounds == result.nbr_rounds.max()])}")
+    else:
+        if args.distribution in random_sampling:
+            centroids = random_sampling.get(args.distribution)(size=args.size)
+        else:
+            # The mixtures are sampled by inversion of their CDF
+            centroids = np.sort(quantization.ppf(np.random.uniform(size=args.size)))
+        trace = TraceWriter(args.trace) if args.trace is not None else None
+        try:
+            centroids, probas, distortions = optimizers.get(args.method)(
+                centroids, args.nbr_iter, checkpoint=checkpoint, trace=trace
+            )
+        finally:
+            if trace is not None:
+                trace.close()
 
     if args.print_distortions:
         print_distortion_curve(distortions)
@@ -0,0 +1,80 @@
+import numpy as np
+import argparse
+
+from scipy.integrate import quad
+
+from univariate.exponential_quantization import ExponentialVoronoiQuantization
+from univariate.lognormal_quantization import LogNormalVoronoiQuantization
+from univariate.normal_quantization import NormalVoronoiQuantization
+
+np.set_printoptions(precision=3)
+np.set_printoptions(linewidth=np.inf)
+
+
+def reference_cells(quantization, vertices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """High-precision probabilities and expectations of each cell by adaptive quadrature of the density.
+
+    Integrating the density directly on each cell does not involve any difference of CDF values, hence the relative
+    accuracy of the reference does not degrade in the tails.
+    """
+    probabilities = np.empty(len(vertices) - 1)
+    expectations = np.empty(len(vertices) - 1)
+    for i, (a, b) in enumerate(zip(vertices[:-1], vertices[1:])):
+        probabilities[i] = quad(quantization.pdf, a, b, epsabs=0.0, epsrel=1e-13, limit=200)[0]
+        expectations[i] = quad(lambda x: x * quantization.pdf(x), a, b, epsabs=0.0, epsrel=1e-13, limit=200)[0]
+    return probabilities, expectations
+
+
+def relative_error(values: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    return np.abs(values - reference) / np.abs(reference)
+
+
+if __name__ == "__main__":
+    quantizers = {
+        "normal": NormalVoronoiQuantization,
+        "lognormal": LogNormalVoronoiQuantization,
+        "exponential": ExponentialVoronoiQuantization,
+    }
+
+    # Centroids reaching far enough in the right tail to get cells of probability close to 1e-15
+    tail_centroids = {
+        "normal": lambda N: np.linspace(-8.0, 8.0, N),
+        "lognormal": lambda N: np.exp(np.linspace(-8.0, 8.0, N)),
+        "exponential": lambda N: np.linspace(0.01, 35.0, N),
+    }
+
+    parser = argparse.ArgumentParser(
+        description="Compare the cells probabilities and expectations to high-precision reference values"
+    )
+    parser.add_argument("-N", "--size", type=int, help="Size of quantizer", default=50)
+    parser.add_argument(
+        "-d",
+        "--distribution",
+        type=str,
+        choices=list(quantizers),
+        help="Distribution of the quantizer to check",
+        required=True,
+    )
+    args = parser.parse_args()
+
+    quantization = quantizers.get(args.distribution)()
+    centroids = tail_centroids.get(args.distribution)(args.size)
+    vertices = quantization.get_vertices(centroids)
+
+    reference_probabilities, reference_expectations = reference_cells(quantization, vertices)
+    naive_probabilities = np.diff(quantization.cdf(vertices))
+    probabilities = quantization.cells_probability(vertices)
+    expectations = quantization.cells_expectation(vertices)
+
+    print(f"reference probabilities  : {reference_probabilities}")
+    print(f"rel. error (CDF diff.)   : {relative_error(naive_probabilities, reference_probabilities)}")
+    print(f"rel. error (log-space)   : {relative_error(probabilities, reference_probabilities)}")
+    print(f"rel. error (expectation) : {relative_error(expectations, reference_expectations)}")
+    print()
+    print(
+        f"max rel. error probabilities (CDF diff.) : {relative_error(naive_probabilities, reference_probabilities).max():.3e}"
+    )
+    print(
+        f"max rel. error probabilities (log-space) : {relative_error(probabilities, reference_probabilities).max():.3e}"
+    )
+    print(f"max rel. error expectations             : {relative_error(expectations, reference_expectations).max():.3e}")
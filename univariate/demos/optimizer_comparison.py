@@ -9,7 +9,7 @@ import numpy as np
 
 from univariate.voronoi_quantization import VoronoiQuantization1D
 
-MethodKey = Literal["lloyd", "mfclvq", "nr", "nrlm"]
+MethodKey = Literal["lloyd", "mfclvq", "nr", "nrlm", "lbfgs"]
 DiagonalTermType = Literal["identity", "hessian"]
 
 
@@ -40,6 +40,7 @@ def compare_methods(
         "mfclvq": ("Mean-field CLVQ", quantizer.mean_field_clvq_method),
         "nr": ("Newton–Raphson", quantizer.newton_raphson_method),
         "nrlm": ("Newton–Raphson (LM)", quantizer.newton_raphson_method_with_levenberg_marquardt),
+        "lbfgs": ("L-BFGS", quantizer.lbfgs_method),
     }
 
     out: Dict[str, List[float]] = {}
@@ -7,7 +7,7 @@ from dataclasses import dataclass, field
 from univariate.voronoi_quantization import VoronoiQuantization1D
 
 
-@dataclass
+@dataclass(frozen=True)
 class ExponentialVoronoiQuantization(VoronoiQuantization1D):
     lambda_: float = field(default=1)
 
@@ -17,8 +17,8 @@ class ExponentialVoronoiQuantization(VoronoiQuantization1D):
     variance: float = field(init=False)
 
     def __post_init__(self):
-        self.mean = 1.0 / self.lambda_
-        self.variance = 1.0 / (self.lambda_**2)
+        object.__setattr__(self, "mean", 1.0 / self.lambda_)
+        object.__setattr__(self, "variance", 1.0 / (self.lambda_**2))
 
     # Probabilty Density Function
     def pdf(self, x: Union[float, np.ndarray]):
@@ -38,3 +38,27 @@ class ExponentialVoronoiQuantization(VoronoiQuantization1D):
         if type(x) == np.ndarray and x[-1] == inf:
             to_return[-1] = self.mean
         return to_return
+
+    # Survival Function
+    def sf(self, x: Union[float, np.ndarray]):
+        return np.exp(-self.lambda_ * x)
+
+    # Percent Point Function
+    def ppf(self, u: Union[float, np.ndarray]):
+        return -np.log1p(-np.asarray(u)) * self.mean
+
+    # Logarithm of the Cumulative Distribution Function
+    def logcdf(self, x: Union[float, np.ndarray]):
+        with np.errstate(divide="ignore"):
+            return np.log(-np.expm1(-self.lambda_ * x))
+
+    # Logarithm of the Survival Function
+    def logsf(self, x: Union[float, np.ndarray]):
+        return -self.lambda_ * x
+
+    # Upper Partial Moment
+    def upper_partial_moment(self, x: Union[float, np.ndarray]):
+        with np.errstate(invalid="ignore"):
+            to_return = np.exp(-self.lambda_ * x) * (x + self.mean)
+        # exp(-inf) * inf is nan, whereas the limit is 0
+        return np.where(np.isinf(x), 0.0, to_return)
@@ -0,0 +1,203 @@
+import heapq
+import numpy as np
+
+from typing import TYPE_CHECKING, List, Tuple
+from scipy.optimize import minimize_scalar
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from univariate.voronoi_quantization import VoronoiQuantization1D
+
+# Sentinel index of the missing neighbour of the first and last points
+_NO_POINT = -1
+
+
+@dataclass
+class GreedyQuantizationSequence:
+    """Nested (greedy) quantization sequence: the point N+1 minimizes the distortion given the first N points.
+
+    :param quantization:
+    :param points: points in insertion order, any prefix being a quantizer (the mean by default)
+    :param distortions: distortion of each prefix
+    :param xatol: absolute tolerance of the search of the best point of each gap
+    """
+
+    quantization: "VoronoiQuantization1D"
+    points: List[float] = field(default_factory=list)
+    distortions: List[float] = field(default_factory=list)
+    xatol: float = 1e-10
+
+    _probabilities: List[float] = field(init=False, default_factory=list, repr=False)
+    _expectations: List[float] = field(init=False, default_factory=list, repr=False)
+    _next: List[int] = field(init=False, default_factory=list, repr=False)
+    _previous: List[int] = field(init=False, default_factory=list, repr=False)
+    _first: int = field(init=False, default=_NO_POINT, repr=False)
+    _last: int = field(init=False, default=_NO_POINT, repr=False)
+    _heap: List[Tuple[float, int, int, float]] = field(init=False, default_factory=list, repr=False)
+
+    def __post_init__(self):
+        q = self.quantization
+        if not self.points:
+            self.points, self.distortions = [q.mean], [0.5 * q.variance]
+        order = np.argsort(self.points)
+        vertices = q.get_vertices(np.asarray(self.points)[order])
+        self._probabilities = [0.0] * len(self.points)
+        self._expectations = [0.0] * len(self.points)
+        self._next = [_NO_POINT] * len(self.points)
+        self._previous = [_NO_POINT] * len(self.points)
+        for index, probability, expectation in zip(order, q.cells_probability(vertices), q.cells_expectation(vertices)):
+            self._probabilities[index] = probability
+            self._expectations[index] = expectation
+        for left, right in zip(order[:-1], order[1:]):
+            self._next[left], self._previous[right] = int(right), int(left)
+        self._first, self._last = int(order[0]), int(order[-1])
+        self._push_gap(_NO_POINT, self._first)
+        for left, right in zip(order[:-1], order[1:]):
+            self._push_gap(int(left), int(right))
+        self._push_gap(self._last, _NO_POINT)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def centroids(self) -> np.ndarray:
+        return np.sort(self.points)
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        """Cached probabilities of the cells of the current quantizer, in the order of `centroids`."""
+        return np.asarray(self._probabilities)[np.argsort(self.points)]
+
+    @property
+    def expectations(self) -> np.ndarray:
+        """Cached first moments of the cells of the current quantizer, in the order of `centroids`."""
+        return np.asarray(self._expectations)[np.argsort(self.points)]
+
+    def extend(self, nbr_points: int) -> "GreedyQuantizationSequence":
+        """Append `nbr_points` points to the sequence."""
+        logger.info("Start greedy quantization (from N={} to N={})", len(self), len(self) + nbr_points)
+        for _ in range(nbr_points):
+            self._insert_best_point()
+        logger.info("End greedy quantization (N={}, distortion={})", len(self), self.distortions[-1])
+        return self
+
+    def prefix(self, N: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantizer made of the first N points of the sequence, its distortion being `distortions[N - 1]`.
+
+        :param N:
+        :return: the sorted centroids and the probabilities of their cells
+        """
+        if not 1 <= N <= len(self):
+            raise ValueError(f"N should be between 1 and {len(self)}")
+        centroids = np.sort(self.points[:N])
+        return centroids, self.quantization.cells_probability(self.quantization.get_vertices(centroids))
+
+    def save(self, path: str) -> None:
+        np.savez(path, points=np.asarray(self.points), distortions=np.asarray(self.distortions))
+
+    @classmethod
+    def load(
+        cls,
+        quantization: "VoronoiQuantization1D",
+        path: str,
+        xatol: float = 1e-10,
+    ) -> "GreedyQuantizationSequence":
+        with np.load(path) as data:
+            points, distortions = data["points"].tolist(), data["distortions"].tolist()
+        return cls(quantization, points, distortions, xatol=xatol)
+
+    def _gain(
+        self,
+        left: int,
+        right: int,
+        y: float,
+    ) -> Tuple[float, np.ndarray, np.ndarray]:
+        # Decrease of the distortion when inserting y between the points `left` and `right`, along with the probabilities
+        # and first moments of the pieces of their cells taken by y
+        q = self.quantization
+        neighbours, vertices = [], []
+        if left != _NO_POINT:
+            a = self.points[left]
+            neighbours.append(a)
+            vertices.append(0.5 * (a + y))
+        else:
+            vertices.append(q.lower_bound_support)
+        if left != _NO_POINT and right != _NO_POINT:
+            vertices.append(0.5 * (self.points[left] + self.points[right]))
+        if right != _NO_POINT:
+            b = self.points[right]
+            neighbours.append(b)
+            vertices.append(0.5 * (y + b))
+        else:
+            vertices.append(q.upper_bound_support)
+        vertices = np.asarray(vertices)
+        probabilities, expectations = q.cells_probability(vertices), q.cells_expectation(vertices)
+        neighbours = np.asarray(neighbours)
+        gain = 0.5 * ((y - neighbours) * (2.0 * expectations - (neighbours + y) * probabilities)).sum()
+        return gain, probabilities, expectations
+
+    def _push_gap(self, left: int, right: int) -> None:
+        # Find the best point of the gap by a bounded search, the tails being mapped to (0, 1) through the quantiles
+        q = self.quantization
+        if left == _NO_POINT:
+            upper = q.cdf(self.points[right])
+            to_point = lambda u: float(q.ppf(u * upper))
+        elif right == _NO_POINT:
+            lower = q.cdf(self.points[left])
+            to_point = lambda u: float(q.ppf(lower + u * (1.0 - lower)))
+        else:
+            a, b = self.points[left], self.points[right]
+            to_point = lambda u: a + u * (b - a)
+        result = minimize_scalar(
+            lambda u: -self._gain(left, right, to_point(u))[0],
+            bounds=(0.0, 1.0),
+            method="bounded",
+            options={"xatol": self.xatol},
+        )
+        y = to_point(result.x)
+        if np.isfinite(y):
+            heapq.heappush(self._heap, (result.fun, left, right, y))
+
+    def _is_gap(self, left: int, right: int) -> bool:
+        if left == _NO_POINT:
+            return self._first == right
+        if right == _NO_POINT:
+            return self._last == left
+        return self._next[left] == right
+
+    def _insert_best_point(self) -> None:
+        # The best point of each gap only depends on its two end points, it is searched once when the gap is created and
+        # kept in the heap: an insertion pops the best gap, splits it in two and updates three cells, in O(log N).
+        # Gaps split by previous insertions are discarded lazily
+        while True:
+            _, left, right, y = heapq.heappop(self._heap)
+            if self._is_gap(left, right):
+                break
+        gain, probabilities, expectations = self._gain(left, right, y)
+
+        index = len(self.points)
+        self.points.append(y)
+        self._probabilities.append(probabilities.sum())
+        self._expectations.append(expectations.sum())
+        self._previous.append(left)
+        self._next.append(right)
+        pieces = 0
+        if left != _NO_POINT:
+            self._probabilities[left] -= probabilities[0]
+            self._expectations[left] -= expectations[0]
+            self._next[left] = index
+            pieces = 1
+        else:
+            self._first = index
+        if right != _NO_POINT:
+            self._probabilities[right] -= probabilities[pieces]
+            self._expectations[right] -= expectations[pieces]
+            self._previous[right] = index
+        else:
+            self._last = index
+        self.distortions.append(self.distortions[-1] - gain)
+
+        self._push_gap(left, index)
+        self._push_gap(index, right)
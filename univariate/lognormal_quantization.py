@@ -3,12 +3,13 @@ import numpy as np
 from cmath import inf
 from typing import Union
 from scipy.stats import lognorm, norm
+from scipy.special import log_ndtr
 from dataclasses import dataclass, field
 
 from univariate.voronoi_quantization import VoronoiQuantization1D
 
 
-@dataclass
+@dataclass(frozen=True)
 class LogNormalVoronoiQuantization(VoronoiQuantization1D):
     sigma: float = field(default=1.0)
 
@@ -18,8 +19,8 @@ class LogNormalVoronoiQuantization(VoronoiQuantization1D):
     variance: float = field(init=False)
 
     def __post_init__(self):
-        self.mean = np.exp(0.5 * self.sigma**2)
-        self.variance = (np.exp(self.sigma**2) - 1.0) * np.exp(self.sigma**2)
+        object.__setattr__(self, "mean", np.exp(0.5 * self.sigma**2))
+        object.__setattr__(self, "variance", (np.exp(self.sigma**2) - 1.0) * np.exp(self.sigma**2))
 
     # Probabilty Density Function
     def pdf(self, x: Union[float, np.ndarray]):
@@ -32,3 +33,26 @@ class LogNormalVoronoiQuantization(VoronoiQuantization1D):
     # First Partial Moment
     def fpm(self, x: Union[float, np.ndarray]):
         return self.mean * norm.cdf(np.log(x) / self.sigma - self.sigma)
+
+    # Survival Function
+    def sf(self, x: Union[float, np.ndarray]):
+        return lognorm.sf(x, s=self.sigma)
+
+    # Percent Point Function
+    def ppf(self, u: Union[float, np.ndarray]):
+        return lognorm.ppf(u, s=self.sigma)
+
+    # Logarithm of the Cumulative Distribution Function
+    def logcdf(self, x: Union[float, np.ndarray]):
+        with np.errstate(divide="ignore"):
+            return log_ndtr(np.log(x) / self.sigma)
+
+    # Logarithm of the Survival Function
+    def logsf(self, x: Union[float, np.ndarray]):
+        with np.errstate(divide="ignore"):
+            return log_ndtr(-np.log(x) / self.sigma)
+
+    # Upper Partial Moment
+    def upper_partial_moment(self, x: Union[float, np.ndarray]):
+        with np.errstate(divide="ignore"):
+            return self.mean * norm.sf(np.log(x) / self.sigma - self.sigma)
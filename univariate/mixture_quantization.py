@@ -0,0 +1,210 @@
+import numpy as np
+
+from cmath import inf
+from typing import Union
+from scipy.special import log_ndtr, logsumexp, ndtr
+from dataclasses import dataclass, field
+
+from univariate.voronoi_quantization import VoronoiQuantization1D
+
+
+def _standardize(
+    x: Union[float, np.ndarray],
+    locations: np.ndarray,
+    scales: np.ndarray,
+) -> np.ndarray:
+    # Broadcast every component against every point: the result has shape (K,) + shape of x
+    x = np.asarray(x, dtype=float)
+    shape = (-1,) + (1,) * x.ndim
+    return (x - locations.reshape(shape)) / scales.reshape(shape)
+
+
+def _mix(
+    weights: np.ndarray,
+    components: np.ndarray,
+) -> np.ndarray:
+    # Weighted sum over the first (component) axis
+    return np.tensordot(weights, components, axes=1)
+
+
+def _log_mix(
+    weights: np.ndarray,
+    log_components: np.ndarray,
+) -> np.ndarray:
+    # Logarithm of the weighted sum over the first (component) axis, computed without leaving the log-space
+    shape = (-1,) + (1,) * (log_components.ndim - 1)
+    return logsumexp(log_components + np.log(weights).reshape(shape), axis=0)
+
+
+def _std_normal_pdf(z: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * z**2) / np.sqrt(2.0 * np.pi)
+
+
+def _read_only(values) -> np.ndarray:
+    # The quantizers are frozen: their parameters are copied and locked so that they cannot be modified in place
+    array = np.array(values, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
+def _parameters_equal(q, other) -> bool:
+    # The parameters are read-only, hence mixtures can be compared and hashed by value
+    return type(q) is type(other) and all(np.array_equal(a, b) for a, b in zip(q._parameters(), other._parameters()))
+
+
+def _parameters_hash(q) -> int:
+    # Adding 0.0 maps -0.0 to 0.0, both being equal
+    return hash((type(q),) + tuple((p + 0.0).tobytes() for p in q._parameters()))
+
+
+def _check_parameters(weights: np.ndarray, *parameters: np.ndarray) -> None:
+    if any(p.shape != weights.shape for p in parameters) or weights.ndim != 1:
+        raise ValueError("Weights and components parameters should be 1D arrays of the same size")
+    if np.any(weights < 0.0) or not np.isclose(weights.sum(), 1.0):
+        raise ValueError("Weights should be non-negative and sum to 1")
+
+
+@dataclass(frozen=True, eq=False)
+class NormalMixtureVoronoiQuantization(VoronoiQuantization1D):
+    """Mixture of K Gaussian laws $\\sum_k w_k \\mathcal{N}(\\mu_k, \\sigma_k^2)$, compared and hashed by value.
+
+    :param weights: non-negative weights summing to 1
+    :param means:
+    :param stds:
+    """
+
+    weights: np.ndarray
+    means: np.ndarray
+    stds: np.ndarray
+
+    lower_bound_support: float = field(init=False, default=-inf)
+    upper_bound_support: float = field(init=False, default=inf)
+    mean: float = field(init=False)
+    variance: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "weights", _read_only(self.weights))
+        object.__setattr__(self, "means", _read_only(self.means))
+        object.__setattr__(self, "stds", _read_only(self.stds))
+        _check_parameters(self.weights, self.means, self.stds)
+        mean = self.weights.dot(self.means)
+        object.__setattr__(self, "mean", mean)
+        object.__setattr__(self, "variance", self.weights.dot(self.stds**2 + self.means**2) - mean**2)
+
+    def _parameters(self):
+        return self.weights, self.means, self.stds
+
+    def __eq__(self, other):
+        return _parameters_equal(self, other)
+
+    def __hash__(self):
+        return _parameters_hash(self)
+
+    # Probabilty Density Function
+    def pdf(self, x: Union[float, np.ndarray]):
+        z = _standardize(x, self.means, self.stds)
+        return _mix(self.weights / self.stds, _std_normal_pdf(z))
+
+    # Cumulative Distribution Function
+    def cdf(self, x: Union[float, np.ndarray]):
+        return _mix(self.weights, ndtr(_standardize(x, self.means, self.stds)))
+
+    # First Partial Moment, E[X 1_{X <= x}] = sum_k w_k (mu_k Phi(z_k) - sigma_k phi(z_k))
+    def fpm(self, x: Union[float, np.ndarray]):
+        z = _standardize(x, self.means, self.stds)
+        return _mix(self.weights * self.means, ndtr(z)) - _mix(self.weights * self.stds, _std_normal_pdf(z))
+
+    # Survival Function
+    def sf(self, x: Union[float, np.ndarray]):
+        return _mix(self.weights, ndtr(-_standardize(x, self.means, self.stds)))
+
+    # Logarithm of the Cumulative Distribution Function
+    def logcdf(self, x: Union[float, np.ndarray]):
+        return _log_mix(self.weights, log_ndtr(_standardize(x, self.means, self.stds)))
+
+    # Logarithm of the Survival Function
+    def logsf(self, x: Union[float, np.ndarray]):
+        return _log_mix(self.weights, log_ndtr(-_standardize(x, self.means, self.stds)))
+
+    # Upper Partial Moment, E[X 1_{X > x}] = sum_k w_k (mu_k Phi(-z_k) + sigma_k phi(z_k))
+    def upper_partial_moment(self, x: Union[float, np.ndarray]):
+        z = _standardize(x, self.means, self.stds)
+        return _mix(self.weights * self.means, ndtr(-z)) + _mix(self.weights * self.stds, _std_normal_pdf(z))
+
+
+@dataclass(frozen=True, eq=False)
+class LogNormalMixtureVoronoiQuantization(VoronoiQuantization1D):
+    """Mixture of K log-normal laws $\\sum_k w_k \\mathcal{LN}(\\mu_k, \\sigma_k^2)$, compared and hashed by value.
+
+    :param weights: non-negative weights summing to 1
+    :param mus: means of the logarithms of the components
+    :param sigmas: standard deviations of the logarithms of the components
+    """
+
+    weights: np.ndarray
+    mus: np.ndarray
+    sigmas: np.ndarray
+
+    lower_bound_support: float = field(init=False, default=0.0)
+    upper_bound_support: float = field(init=False, default=inf)
+    mean: float = field(init=False)
+    variance: float = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "weights", _read_only(self.weights))
+        object.__setattr__(self, "mus", _read_only(self.mus))
+        object.__setattr__(self, "sigmas", _read_only(self.sigmas))
+        _check_parameters(self.weights, self.mus, self.sigmas)
+        mean = self.weights.dot(self.components_means)
+        object.__setattr__(self, "mean", mean)
+        object.__setattr__(self, "variance", self.weights.dot(np.exp(2.0 * self.mus + 2.0 * self.sigmas**2)) - mean**2)
+
+    @property
+    def components_means(self) -> np.ndarray:
+        return np.exp(self.mus + 0.5 * self.sigmas**2)
+
+    def _standardize_log(self, x: Union[float, np.ndarray]) -> np.ndarray:
+        with np.errstate(divide="ignore"):
+            return _standardize(np.log(x), self.mus, self.sigmas)
+
+    def _parameters(self):
+        return self.weights, self.mus, self.sigmas
+
+    def __eq__(self, other):
+        return _parameters_equal(self, other)
+
+    def __hash__(self):
+        return _parameters_hash(self)
+
+    # Probabilty Density Function
+    def pdf(self, x: Union[float, np.ndarray]):
+        x = np.asarray(x, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            to_return = _mix(self.weights / self.sigmas, _std_normal_pdf(self._standardize_log(x))) / x
+        return np.where(x > 0.0, to_return, 0.0)
+
+    # Cumulative Distribution Function
+    def cdf(self, x: Union[float, np.ndarray]):
+        return _mix(self.weights, ndtr(self._standardize_log(x)))
+
+    # First Partial Moment, E[X 1_{X <= x}] = sum_k w_k m_k Phi(z_k - sigma_k)
+    def fpm(self, x: Union[float, np.ndarray]):
+        z = self._standardize_log(x)
+        return _mix(self.weights * self.components_means, ndtr(z - self.sigmas.reshape((-1,) + (1,) * (z.ndim - 1))))
+
+    # Survival Function
+    def sf(self, x: Union[float, np.ndarray]):
+        return _mix(self.weights, ndtr(-self._standardize_log(x)))
+
+    # Logarithm of the Cumulative Distribution Function
+    def logcdf(self, x: Union[float, np.ndarray]):
+        return _log_mix(self.weights, log_ndtr(self._standardize_log(x)))
+
+    # Logarithm of the Survival Function
+    def logsf(self, x: Union[float, np.ndarray]):
+        return _log_mix(self.weights, log_ndtr(-self._standardize_log(x)))
+
+    # Upper Partial Moment, E[X 1_{X > x}] = sum_k w_k m_k Phi(sigma_k - z_k)
+    def upper_partial_moment(self, x: Union[float, np.ndarray]):
+        z = self._standardize_log(x)
+        return _mix(self.weights * self.components_means, ndtr(self.sigmas.reshape((-1,) + (1,) * (z.ndim - 1)) - z))
@@ -0,0 +1,157 @@
+import inspect
+import numpy as np
+
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from loguru import logger
+
+from univariate.thread_pool import OPTIMIZERS, QuantizerBuild, run_build
+from univariate.voronoi_quantization import VoronoiQuantization1D
+
+
+@dataclass(frozen=True)
+class MultiStartResult:
+    """Outcome of `multi_start_search`: the best quantizer, and the last distortion, number of rounds and
+    initialization strategy ("quantile", "split" or "random") of every start.
+    """
+
+    centroids: np.ndarray
+    probabilities: np.ndarray
+    distortions: List[float]
+    minima: np.ndarray
+    nbr_rounds: np.ndarray
+    strategies: List[str]
+
+    @property
+    def best_start(self) -> int:
+        return int(np.argmin(np.where(self.nbr_rounds == self.nbr_rounds.max(), self.minima, np.inf)))
+
+
+def _quantile_start(quantization: VoronoiQuantization1D, N: int) -> np.ndarray:
+    return quantization.ppf((2.0 * np.arange(1, N + 1) - 1.0) / (2.0 * N))
+
+
+def _split_start(
+    quantization: VoronoiQuantization1D,
+    centroids: np.ndarray,
+    probabilities: np.ndarray,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    # Split a cell of an optimal quantizer of size N-1, chosen with its probability, at a random quantile of the cell
+    vertices = quantization.get_vertices(centroids)
+    cell = rng.choice(len(centroids), p=probabilities / probabilities.sum())
+    u = rng.uniform(quantization.cdf(vertices[cell]), quantization.cdf(vertices[cell + 1]))
+    return np.sort(np.append(centroids, quantization.ppf(u)))
+
+
+def _num_warmup_iterations(quantization: VoronoiQuantization1D, method: str, options: Dict[str, Any]) -> int:
+    # Lloyd iterations run by an optimizer (nr, nrlm) before its first step, counted in its number of iterations
+    parameter = inspect.signature(getattr(quantization, OPTIMIZERS[method])).parameters.get("num_warmup_iterations")
+    if parameter is None:
+        return 0
+    return options.get("num_warmup_iterations", parameter.default)
+
+
+def multi_start_search(
+    quantization: VoronoiQuantization1D,
+    N: int,
+    nbr_starts: int = 16,
+    nbr_iterations: int = 200,
+    method: str = "lbfgs",
+    nbr_rounds: int = 4,
+    keep_fraction: float = 0.5,
+    seed: int = 0,
+    executor: str = "thread",
+    max_workers: Optional[int] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> MultiStartResult:
+    """Search for the global minimum of the distortion of a multimodal law from several initializations, advanced
+    concurrently in rounds after each of which only the `keep_fraction` best starts are kept. Deterministic given the
+    seed. The Lloyd warmup of `nr` and `nrlm` only runs in the first round.
+
+    :param quantization:
+    :param N: size of the quantizer
+    :param nbr_starts: number of initializations
+    :param nbr_iterations: total number of iterations of a start that survives all the rounds
+    :param method: optimizer key of `univariate.thread_pool.OPTIMIZERS`
+    :param nbr_rounds: number of rounds, with a pruning after each one but the last
+    :param keep_fraction: fraction of the surviving starts kept after each round (at least one is kept)
+    :param seed: seed of the initializations
+    :param executor: "thread" or "process"
+    :param max_workers: number of workers of the pool
+    :param options: extra keyword arguments passed to the optimizer
+    :return: the best quantizer and the distribution of the minima found
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor {executor}, should be 'thread' or 'process'")
+    if not 0.0 < keep_fraction <= 1.0:
+        raise ValueError("keep_fraction should be in (0, 1]")
+    options = {} if options is None else options
+    pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+    rng = np.random.default_rng(seed)
+    num_warmup_iterations = _num_warmup_iterations(quantization, method, options)
+    if nbr_iterations <= num_warmup_iterations:
+        raise ValueError(
+            f"nbr_iterations should be greater than the {num_warmup_iterations} warmup iterations of method {method}"
+        )
+    iterations_by_round = [
+        len(chunk)
+        for chunk in np.array_split(np.arange(nbr_iterations - num_warmup_iterations), nbr_rounds)
+        if len(chunk)
+    ]
+    iterations_by_round[0] += num_warmup_iterations
+
+    logger.info(
+        "Start multi-start search (N={}, nbr_starts={}, method={}, nbr_rounds={}, executor={})",
+        N,
+        nbr_starts,
+        method,
+        nbr_rounds,
+        executor,
+    )
+    with pool_class(max_workers=max_workers) as pool:
+        starts, strategies = [_quantile_start(quantization, N)], ["quantile"]
+        nbr_split_starts = min(nbr_starts // 4, nbr_starts - 1) if N > 1 else 0
+        if nbr_split_starts > 0:
+            coarse = QuantizerBuild(quantization, method, _quantile_start(quantization, N - 1), nbr_iterations, options)
+            coarse_centroids, coarse_probabilities, _ = pool.submit(run_build, coarse).result()
+            for _ in range(nbr_split_starts):
+                starts.append(_split_start(quantization, coarse_centroids, coarse_probabilities, rng))
+                strategies.append("split")
+        while len(starts) < nbr_starts:
+            starts.append(np.sort(quantization.ppf(rng.uniform(size=N))))
+            strategies.append("random")
+
+        minima = np.full(len(starts), np.inf)
+        nbr_rounds_done = np.zeros(len(starts), dtype=int)
+        results = [(start, None, []) for start in starts]
+        alive = np.arange(len(starts))
+        for round_index, nbr_iterations_round in enumerate(iterations_by_round):
+            options_round = options
+            if round_index > 0 and num_warmup_iterations > 0:
+                # The starts are already warmed up
+                options_round = {**options, "num_warmup_iterations": 0}
+            builds = [
+                QuantizerBuild(quantization, method, results[i][0], nbr_iterations_round, options_round) for i in alive
+            ]
+            for i, (centroids, probabilities, distortions) in zip(alive, pool.map(run_build, builds)):
+                results[i] = (centroids, probabilities, results[i][2] + list(distortions))
+                minima[i] = distortions[-1]
+                nbr_rounds_done[i] += 1
+            if round_index < len(iterations_by_round) - 1:
+                nbr_kept = max(1, int(np.ceil(keep_fraction * len(alive))))
+                alive = np.sort(alive[np.argsort(minima[alive], kind="stable")[:nbr_kept]])
+            logger.debug("Round {} of multi-start search: {} starts alive", round_index, len(alive))
+
+    best = int(alive[np.argmin(minima[alive])])
+    logger.info(
+        "End multi-start search (best_start={}, strategy={}, distortion={}, distinct_minima={})",
+        best,
+        strategies[best],
+        minima[best],
+        len(np.unique(np.round(minima[alive], 10))),
+    )
+    centroids, probabilities, distortions = results[best]
+    return MultiStartResult(centroids, probabilities, distortions, minima, nbr_rounds_done, strategies)
@@ -3,12 +3,13 @@ import numpy as np
 from cmath import inf
 from typing import Union
 from scipy.stats import norm
+from scipy.special import log_ndtr
 from dataclasses import dataclass, field
 
 from univariate.voronoi_quantization import VoronoiQuantization1D
 
 
-@dataclass
+@dataclass(frozen=True)
 class NormalVoronoiQuantization(VoronoiQuantization1D):
     lower_bound_support: float = field(init=False, default=-inf)
     upper_bound_support: float = field(init=False, default=inf)
@@ -27,7 +28,22 @@ class NormalVoronoiQuantization(VoronoiQuantization1D):
     def fpm(self, x: Union[float, np.ndarray]):
         return -self.pdf(x)
 
-    def lr(self, N: int, n: int, max_iter: int):
-        a = 2.0 * N
-        b = np.pi / float(N * N)
-        return a / float(a + b * (n + 1.0))
+    # Survival Function
+    def sf(self, x: Union[float, np.ndarray]):
+        return norm.sf(x)
+
+    # Percent Point Function
+    def ppf(self, u: Union[float, np.ndarray]):
+        return norm.ppf(u)
+
+    # Logarithm of the Cumulative Distribution Function
+    def logcdf(self, x: Union[float, np.ndarray]):
+        return log_ndtr(x)
+
+    # Logarithm of the Survival Function
+    def logsf(self, x: Union[float, np.ndarray]):
+        return log_ndtr(-np.asarray(x))
+
+    # Upper Partial Moment
+    def upper_partial_moment(self, x: Union[float, np.ndarray]):
+        return self.pdf(x)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from univariate.voronoi_quantization import VoronoiQuantization1D
+
+# Name of the optimization method of `VoronoiQuantization1D` for each key used in the demos
+OPTIMIZERS = {
+    "lloyd": "deterministic_lloyd_method",
+    "mfclvq": "mean_field_clvq_method",
+    "nr": "newton_raphson_method",
+    "nrlm": "newton_raphson_method_with_levenberg_marquardt",
+    "lbfgs": "lbfgs_method",
+}
+
+
+@dataclass(frozen=True)
+class QuantizerBuild:
+    """An independent optimization: a quantizer, an optimizer key of `OPTIMIZERS`, its initial centroids, its number
+    of iterations and extra keyword arguments (e.g. an `OptimizationWorkspace` or an `OptimizerCheckpoint`).
+    """
+
+    quantization: VoronoiQuantization1D
+    method: str
+    centroids: np.ndarray
+    nbr_iterations: int
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+def run_build(build: QuantizerBuild) -> Tuple[np.ndarray, np.ndarray, List[float]]:
+    optimizer = getattr(build.quantization, OPTIMIZERS[build.method])
+    return optimizer(np.array(build.centroids, dtype=float), build.nbr_iterations, **build.options)
+
+
+def run_builds_in_thread_pool(
+    builds: Sequence[QuantizerBuild],
+    max_workers: Optional[int] = None,
+) -> List[Tuple[np.ndarray, np.ndarray, List[float]]]:
+    """Run independent builds concurrently in a thread pool.
+
+    The quantizers are frozen and reentrant, so builds may share the same quantizer (and any large precomputed table
+    it holds) without copies, whereas a process pool would pickle it for every task. The heavy lifting is done by
+    NumPy/SciPy kernels that release the GIL.
+
+    :param builds:
+    :param max_workers: number of threads, see `concurrent.futures.ThreadPoolExecutor`
+    :return: the (centroids, probabilities, distortions) of each build, in the same order as `builds`
+    """
+    logger.info("Start thread pool (builds={}, max_workers={})", len(builds), max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(run_build, builds))
+    logger.info("End thread pool (builds={})", len(builds))
+    return results
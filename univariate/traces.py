@@ -0,0 +1,99 @@
+import numpy as np
+
+import os
+import time
+from typing import BinaryIO, List, Sequence
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+TRACE_MAGIC = b"QTRACE01"
+TRACE_HEADER_SIZE = 64
+# One fixed-size little-endian record per step: the file is append-only and each column is a strided view of the map
+TRACE_DTYPE = np.dtype(
+    [
+        ("step", "<i8"),
+        ("distortion", "<f8"),
+        ("gradient_norm", "<f8"),
+        ("lambda_", "<f8"),
+        ("elapsed", "<f8"),
+    ]
+)
+
+
+@dataclass
+class TraceWriter:
+    """Append-only binary trace of an optimizer of `VoronoiQuantization1D`, one `TRACE_DTYPE` record per step.
+
+    :param path: trace file, appended to if it exists (steps resumed from a checkpoint may then appear twice)
+    :param buffer_size: number of records buffered before each write
+    """
+
+    path: str
+    buffer_size: int = 4096
+
+    _file: BinaryIO = field(init=False, repr=False)
+    _buffer: np.ndarray = field(init=False, repr=False)
+    _nbr_buffered: int = field(init=False, default=0, repr=False)
+    _start: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        previous = load_trace(self.path) if os.path.exists(self.path) else np.empty(0, dtype=TRACE_DTYPE)
+        self._start = time.perf_counter() - (float(previous["elapsed"][-1]) if len(previous) else 0.0)
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(TRACE_MAGIC.ljust(TRACE_HEADER_SIZE, b"\x00"))
+        else:
+            # Drop a partial record left by an interrupted write so that the records stay aligned
+            self._file.truncate(TRACE_HEADER_SIZE + len(previous) * TRACE_DTYPE.itemsize)
+        self._buffer = np.empty(self.buffer_size, dtype=TRACE_DTYPE)
+
+    def append(
+        self,
+        step: int,
+        distortion: float,
+        gradient_norm: float = np.nan,
+        lambda_: float = np.nan,
+    ) -> None:
+        self._buffer[self._nbr_buffered] = (step, distortion, gradient_norm, lambda_, time.perf_counter() - self._start)
+        self._nbr_buffered += 1
+        if self._nbr_buffered == self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.write(self._buffer[: self._nbr_buffered].tobytes())
+        self._file.flush()
+        self._nbr_buffered = 0
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            logger.debug("Trace {} closed", self.path)
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_trace(path: str) -> np.ndarray:
+    """Memory-map a trace written by `TraceWriter`, ignoring a partial last record (interrupted write).
+
+    :param path:
+    :return: read-only structured array of dtype `TRACE_DTYPE`
+    """
+    with open(path, "rb") as f:
+        magic = f.read(len(TRACE_MAGIC))
+    if magic != TRACE_MAGIC:
+        raise ValueError(f"{path} is not a quantization trace")
+    nbr_records = (os.path.getsize(path) - TRACE_HEADER_SIZE) // TRACE_DTYPE.itemsize
+    if nbr_records <= 0:
+        # np.memmap cannot map an empty region
+        return np.empty(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=TRACE_HEADER_SIZE, shape=(nbr_records,))
+
+
+def load_traces(paths: Sequence[str]) -> List[np.ndarray]:
+    return [load_trace(path) for path in paths]
@@ -7,7 +7,7 @@ from dataclasses import dataclass, field
 from univariate.voronoi_quantization import VoronoiQuantization1D
 
 
-@dataclass
+@dataclass(frozen=True)
 class UniformVoronoiQuantization(VoronoiQuantization1D):
     lower_bound_support: float = field(init=False, default=0)
     upper_bound_support: float = field(init=False, default=1)
@@ -30,3 +30,7 @@ class UniformVoronoiQuantization(VoronoiQuantization1D):
     # First Partial Moment
     def fpm(self, x: Union[float, np.ndarray]):
         return 0.5 * x**2
+
+    # Percent Point Function
+    def ppf(self, u: Union[float, np.ndarray]):
+        return uniform.ppf(u)
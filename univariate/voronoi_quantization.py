@@ -3,12 +3,26 @@ import numpy as np
 
 import sys
 import os
-from typing import List, Literal, Tuple, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Literal, Optional, Sequence, Tuple, Union
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 
 from loguru import logger
 
+from univariate.checkpoint import OptimizerCheckpoint
+from univariate.greedy_quantization import GreedyQuantizationSequence
+from univariate.conditioning import (
+    DAMPING_TYPES,
+    HessianConditioning,
+    condition_number,
+    spectral_entropy,
+    tridiagonal_spectrum,
+)
+from univariate.traces import TraceWriter
+from univariate.workspace import OptimizationWorkspace
+
 
 def _configure_default_logger() -> None:
     # Set INFO as the default level for this project.
@@ -25,8 +39,16 @@ def _configure_default_logger() -> None:
 _configure_default_logger()
 
 
-@dataclass
+@dataclass(frozen=True)
 class VoronoiQuantization1D(ABC):
+    """Abstract one-dimensional Voronoi quantizer of a random variable $X$.
+
+    Instances are frozen and only describe the distribution of $X$: all the per-run state of the optimizers lives in
+    their local variables or in an `OptimizationWorkspace`. Hence a quantizer is reentrant and can be shared by
+    concurrent optimizations running in several threads. Being frozen, derived classes computing fields in
+    `__post_init__` (e.g. the mean and variance from the parameters of the law) set them through `object.__setattr__`.
+    """
+
     mean: float = field(init=False)
     variance: float = field(init=False)
 
@@ -93,28 +115,189 @@ class VoronoiQuantization1D(ABC):
         :param centroids:
         :return: an array of size (N, N) containing the hessian
         """
-        N = len(centroids)
-        result = np.zeros((N, N))
-        vertices = self.get_vertices(centroids)
-        proba_of_each_cell = self.cells_probability(vertices)
-        tempDens = self.pdf(vertices)
-
-        a = 0.0
-        for i in range(N - 1):
-            result[i, i] = 2.0 * proba_of_each_cell[i] - tempDens[i] * a
-            a = (centroids[i + 1] - centroids[i]) * 0.5
-            result[i, i] -= tempDens[i + 1] * a
-            result[i, i + 1] = -a * tempDens[i + 1]
-            result[i + 1, i] = result[i, i + 1]
-        result[N - 1, N - 1] = 2 * proba_of_each_cell[N - 1] - tempDens[N - 1] * a
+        diagonal, off_diagonal = self.hessian_distortion_bands(centroids)
+        result = np.diag(diagonal)
+        result[np.arange(len(centroids) - 1), np.arange(1, len(centroids))] = off_diagonal
+        result[np.arange(1, len(centroids)), np.arange(len(centroids) - 1)] = off_diagonal
         return result
 
+    def hessian_distortion_bands(
+        self,
+        centroids: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute the two bands of the (tridiagonal) quadratic distortion's Hessian in O(N) memory.
+
+        :param centroids:
+        :return: the diagonal of size N and the off-diagonal of size N-1
+        """
+        vertices = self.get_vertices(centroids)
+        return self._hessian_bands(centroids, vertices, self.cells_probability(vertices))
+
+    def hessian_conditioning(
+        self,
+        centroids_by_iteration: Sequence[np.ndarray],
+        lambdas: Sequence[float] = (0.0,),
+        damping_types: Sequence[str] = ("identity",),
+        effective_rank: bool = True,
+    ) -> HessianConditioning:
+        """Conditioning of the Levenberg–Marquardt damped Hessians $H + \\lambda D$ for a grid of quantizers (e.g. the
+        iterates of an optimizer), of lambdas and of damping terms $D$ ("identity" for $I$, "diagonal" for
+        $\\mathrm{diag}(H)$ and "hessian" for $H$).
+
+        Only the two bands of the tridiagonal Hessians are built. The spectrum of $H$ is computed once per quantizer
+        and shifted (identity) or scaled (hessian) for every lambda, only the diagonal damping needs one spectrum per
+        lambda. Without `effective_rank`, only the extreme eigenvalues are computed by bisection on Sturm sequences in
+        O(N), whereas a whole tridiagonal spectrum costs O(N^2): large-N studies should leave it out.
+
+        :param centroids_by_iteration: sequence of quantizers, possibly of different sizes
+        :param lambdas:
+        :param damping_types: subset of `univariate.conditioning.DAMPING_TYPES`
+        :param effective_rank: whether to compute the whole spectra, needed by the spectral entropy and effective rank
+        :return: arrays of shape (number of quantizers, number of lambdas, number of damping types)
+        """
+        lambdas = np.asarray(lambdas, dtype=float)
+        for damping_type in damping_types:
+            if damping_type not in DAMPING_TYPES:
+                raise ValueError(f"Invalid damping type: {damping_type}, should be one of {DAMPING_TYPES}")
+        shape = (len(centroids_by_iteration), len(lambdas), len(damping_types))
+        eigenvalue_min, eigenvalue_max, entropy = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+        for i, centroids in enumerate(centroids_by_iteration):
+            diagonal, off_diagonal = self.hessian_distortion_bands(np.asarray(centroids, dtype=float))
+            if "identity" in damping_types or "hessian" in damping_types:
+                low, high, spectrum = tridiagonal_spectrum(diagonal, off_diagonal, effective_rank)
+            for k, damping_type in enumerate(damping_types):
+                if damping_type == "identity":
+                    eigenvalue_min[i, :, k], eigenvalue_max[i, :, k] = low + lambdas, high + lambdas
+                    if effective_rank:
+                        entropy[i, :, k] = spectral_entropy(spectrum + lambdas[:, None])
+                elif damping_type == "hessian":
+                    scales = 1.0 + lambdas
+                    eigenvalue_min[i, :, k] = np.minimum(scales * low, scales * high)
+                    eigenvalue_max[i, :, k] = np.maximum(scales * low, scales * high)
+                    if effective_rank:
+                        entropy[i, :, k] = spectral_entropy(scales[:, None] * spectrum)
+                else:
+                    for j, lambda_ in enumerate(lambdas):
+                        damped = tridiagonal_spectrum((1.0 + lambda_) * diagonal, off_diagonal, effective_rank)
+                        eigenvalue_min[i, j, k], eigenvalue_max[i, j, k] = damped[0], damped[1]
+                        if effective_rank:
+                            entropy[i, j, k] = spectral_entropy(damped[2])
+        return HessianConditioning(
+            lambdas=lambdas,
+            damping_types=tuple(damping_types),
+            eigenvalue_min=eigenvalue_min,
+            eigenvalue_max=eigenvalue_max,
+            condition_number=condition_number(eigenvalue_min, eigenvalue_max),
+            spectral_entropy=entropy,
+            effective_rank=np.exp(entropy),
+        )
+
+    def _hessian_bands(
+        self,
+        centroids: np.ndarray,
+        vertices: np.ndarray,
+        proba_of_each_cell: np.ndarray,
+        lower_gap: float = 0.0,
+        upper_gap: float = 0.0,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # `lower_gap` and `upper_gap` are the distances to the (fixed) centroids lying just outside of `centroids`, they
+        # are zero when the first and last vertices are the bounds of the support.
+        half_gaps = 0.5 * np.concatenate(([lower_gap], np.diff(centroids), [upper_gap]))
+        weighted_densities = self.pdf(vertices) * half_gaps
+        diagonal = 2.0 * proba_of_each_cell - weighted_densities[:-1] - weighted_densities[1:]
+        off_diagonal = -weighted_densities[1:-1]
+        return diagonal, off_diagonal
+
+    def upsample_centroids(
+        self,
+        centroids: np.ndarray,
+        N: int,
+    ) -> np.ndarray:
+        """Build N sorted centroids from a smaller quantizer by linear interpolation of its points as a function of
+        their rank, used as a starting point for the coarse-to-fine schedules.
+
+        Outside of the coarse points, the interpolation goes towards the bounds of the support when they are finite
+        and extrapolates the slope of the two extreme points otherwise.
+
+        :param centroids: sorted centroids of the coarse quantizer
+        :param N: size of the new quantizer
+        :return: list of size N
+        """
+        if len(centroids) < 2:
+            raise ValueError("At least two centroids are needed in order to upsample a quantizer")
+        ranks = (np.arange(len(centroids)) + 0.5) / len(centroids)
+        new_ranks = (np.arange(N) + 0.5) / N
+        if np.isfinite(self.lower_bound_support):
+            ranks = np.insert(ranks, 0, 0.0)
+            centroids = np.insert(centroids, 0, self.lower_bound_support)
+        if np.isfinite(self.upper_bound_support):
+            ranks = np.append(ranks, 1.0)
+            centroids = np.append(centroids, self.upper_bound_support)
+        new_centroids = np.interp(new_ranks, ranks, centroids)
+        below, above = new_ranks < ranks[0], new_ranks > ranks[-1]
+        new_centroids[below] = centroids[0] - (ranks[0] - new_ranks[below]) * (centroids[1] - centroids[0]) / (
+            ranks[1] - ranks[0]
+        )
+        new_centroids[above] = centroids[-1] + (new_ranks[above] - ranks[-1]) * (centroids[-1] - centroids[-2]) / (
+            ranks[-1] - ranks[-2]
+        )
+        return new_centroids
+
+    def order_preserving_update(
+        self,
+        centroids: np.ndarray,
+        direction: np.ndarray,
+        fraction_to_boundary: float = 0.995,
+        lower_bound: Optional[float] = None,
+        upper_bound: Optional[float] = None,
+    ) -> Tuple[np.ndarray, bool]:
+        """Move the centroids along `direction` without breaking their ordering.
+
+        The step length (at most 1) is the largest one such that every gap between adjacent centroids (and between the
+        extreme centroids and the bounds of the support) keeps at least a fraction `1 - fraction_to_boundary` of its
+        current size (fraction-to-the-boundary rule). The ordering is then checked in O(N) and the centroids are only
+        sorted as a fallback, e.g. when the input centroids are not sorted.
+
+        :param centroids: sorted centroids
+        :param direction: update direction, the full step is `centroids + direction`
+        :param fraction_to_boundary: fraction of each gap a step is allowed to consume, in (0, 1)
+        :param lower_bound: bound the centroids must stay above, the lower bound of the support by default
+        :param upper_bound: bound the centroids must stay below, the upper bound of the support by default
+        :return: the updated centroids and whether the fallback sort was needed
+        """
+        lower_bound = self.lower_bound_support if lower_bound is None else lower_bound
+        upper_bound = self.upper_bound_support if upper_bound is None else upper_bound
+        positions = np.concatenate(([lower_bound], centroids, [upper_bound]))
+        moves = np.concatenate(([0.0], direction, [0.0]))
+        gaps = np.diff(positions)
+        gaps_change = np.diff(moves)
+
+        step_length = 1.0
+        shrinking = (gaps_change < 0.0) & (gaps > 0.0) & np.isfinite(gaps)
+        if shrinking.any():
+            with np.errstate(over="ignore"):
+                step_length = min(1.0, (-fraction_to_boundary * gaps[shrinking] / gaps_change[shrinking]).min())
+
+        new_centroids = centroids + step_length * direction
+        if np.all(new_centroids[1:] > new_centroids[:-1]):
+            return new_centroids, False
+        new_centroids.sort()
+        return new_centroids, True
+
+    def _checkpoint_parameters(self, **parameters) -> dict:
+        # Parameters of a run stored in its checkpoint, starting with the quantizer itself: its repr (type and fields,
+        # printed without loss of precision) prevents a run on another distribution from resuming the checkpoint
+        with np.printoptions(floatmode="unique", threshold=sys.maxsize):
+            return dict(quantization=repr(self), **parameters)
+
     ## Optimization methods ##
 
     def deterministic_lloyd_method(
         self,
         centroids: np.ndarray,
         nbr_iterations: int,
+        checkpoint: Optional[OptimizerCheckpoint] = None,
+        trace: Optional[TraceWriter] = None,
     ) -> Tuple[np.ndarray, np.ndarray, List[float]]:
         if nbr_iterations == 0:
             return centroids, self.cells_probability(self.get_vertices(centroids)), []
@@ -125,12 +308,32 @@ class VoronoiQuantization1D(ABC):
             nbr_iterations,
         )
         distortions = []
-        for i in range(nbr_iterations):
+        start = 0
+        parameters = self._checkpoint_parameters(nbr_centroids=len(centroids), nbr_iterations=nbr_iterations)
+
+        def checkpoint_state(iteration):
+            # State written by both the periodic and the final saves
+            return dict(centroids=centroids, distortions=distortions, iteration=iteration)
+
+        state = checkpoint.load("lloyd", parameters) if checkpoint is not None else None
+        if state is not None:
+            centroids, distortions, start = state["centroids"], list(state["distortions"]), int(state["iteration"])
+        for i in range(start, nbr_iterations):
             vertices = self.get_vertices(centroids)
             mean_of_each_cell = self.cells_expectation(vertices)
             proba_of_each_cell = self.cells_probability(vertices)
+            if trace is not None:
+                gradient_norm = np.linalg.norm(centroids * proba_of_each_cell - mean_of_each_cell)
             centroids = mean_of_each_cell / proba_of_each_cell
             distortions.append(self.distortion(centroids))
+            if trace is not None:
+                trace.append(len(distortions), distortions[-1], gradient_norm)
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save("lloyd", parameters, **checkpoint_state(i + 1))
+        if checkpoint is not None:
+            checkpoint.save("lloyd", parameters, **checkpoint_state(nbr_iterations))
+        if trace is not None:
+            trace.flush()
         probabilities = self.cells_probability(self.get_vertices(centroids))
         logger.info("End Lloyd (final_distortion={})", distortions[-1] if distortions else None)
         return centroids, probabilities, distortions
@@ -139,22 +342,105 @@ class VoronoiQuantization1D(ABC):
         self,
         centroids: np.ndarray,
         nbr_iterations: int,
+        initial_step: float = 1.0,
+        max_step: float = 1.8,
+        step_growth: float = 1.2,
+        max_backtracking: int = 20,
+        fraction_to_boundary: float = 0.5,
+        workspace: Optional[OptimizationWorkspace] = None,
+        checkpoint: Optional[OptimizerCheckpoint] = None,
+        trace: Optional[TraceWriter] = None,
     ) -> Tuple[np.ndarray, np.ndarray, List[float]]:
+        """Mean-field CLVQ with per-centroid step sizes scaled by the inverse cells probabilities.
+
+        The gradient of centroid $i$ is divided by $p_i$, the natural diagonal preconditioner (a unit step is then a
+        Lloyd step). The common step size grows after each successful step and is halved until the distortion
+        decreases, so no per-distribution learning rate schedule is needed. Each step consumes at most a fraction
+        `fraction_to_boundary` of any gap between adjacent centroids, so that repeated steps cannot collapse a gap.
+        """
         logger.info(
             "Start mean-field CLVQ (N={}, iterations={})",
             len(centroids),
             nbr_iterations,
         )
         distortions = []
-        for i in range(nbr_iterations):
-            gradient = self.gradient_distortion(centroids)
-            lr = self.lr(len(centroids), i, nbr_iterations)
-            centroids = centroids - lr * gradient
+        workspace = OptimizationWorkspace() if workspace is None else workspace
+        step = initial_step
+        start = 0
+        parameters = self._checkpoint_parameters(
+            nbr_centroids=len(centroids),
+            nbr_iterations=nbr_iterations,
+            initial_step=initial_step,
+            max_step=max_step,
+            step_growth=step_growth,
+            max_backtracking=max_backtracking,
+            fraction_to_boundary=fraction_to_boundary,
+        )
 
-            centroids.sort()
-            distortions.append(self.distortion(centroids))
-        probabilities = self.cells_probability(self.get_vertices(centroids))
-        logger.info("End mean-field CLVQ (final_distortion={})", distortions[-1] if distortions else None)
+        # Only the counts of this run are stored, they are added to those of the workspace when resuming
+        initial_sort_fallbacks, initial_rejected_steps = workspace.nbr_sort_fallbacks, workspace.nbr_rejected_steps
+
+        def checkpoint_state(iteration):
+            return dict(
+                centroids=centroids,
+                distortions=distortions,
+                iteration=iteration,
+                step=step,
+                nbr_sort_fallbacks=workspace.nbr_sort_fallbacks - initial_sort_fallbacks,
+                nbr_rejected_steps=workspace.nbr_rejected_steps - initial_rejected_steps,
+            )
+
+        state = checkpoint.load("mfclvq", parameters) if checkpoint is not None else None
+        if state is not None:
+            centroids, distortions, start = state["centroids"], list(state["distortions"]), int(state["iteration"])
+            workspace.nbr_sort_fallbacks += int(state["nbr_sort_fallbacks"])
+            workspace.nbr_rejected_steps += int(state["nbr_rejected_steps"])
+            step = float(state["step"])
+        current_distortion, gradient, probabilities = self._distortion_gradient_and_probabilities(centroids)
+        for i in range(start, nbr_iterations):
+            gradient_norm = np.linalg.norm(gradient)
+            direction = -gradient / probabilities
+            improved = False
+            for _ in range(max_backtracking):
+                candidate_centroids, sorted_ = self.order_preserving_update(
+                    centroids, step * direction, fraction_to_boundary=fraction_to_boundary
+                )
+                candidate = self._distortion_gradient_and_probabilities(candidate_centroids)
+                if candidate[0] <= current_distortion:
+                    improved = True
+                    break
+                step *= 0.5
+                logger.info(
+                    "Mean-field CLVQ step {}/{}: no improvement, decreasing step to {}", i + 1, nbr_iterations, step
+                )
+            if improved:
+                workspace.nbr_sort_fallbacks += sorted_
+                centroids = candidate_centroids
+                current_distortion, gradient, probabilities = candidate
+                step = min(max_step, step * step_growth)
+            else:
+                workspace.nbr_rejected_steps += 1
+                logger.warning(
+                    "Mean-field CLVQ step {}/{}: no improvement after {} tries (step ended at {})",
+                    i + 1,
+                    nbr_iterations,
+                    max_backtracking,
+                    step,
+                )
+            distortions.append(current_distortion)
+            if trace is not None:
+                trace.append(len(distortions), current_distortion, gradient_norm)
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save("mfclvq", parameters, **checkpoint_state(i + 1))
+        if checkpoint is not None:
+            checkpoint.save("mfclvq", parameters, **checkpoint_state(nbr_iterations))
+        if trace is not None:
+            trace.flush()
+        logger.info(
+            "End mean-field CLVQ (final_distortion={}, sort_fallbacks={})",
+            distortions[-1] if distortions else None,
+            workspace.nbr_sort_fallbacks,
+        )
         return centroids, probabilities, distortions
 
     def newton_raphson_method(
@@ -162,6 +448,9 @@ class VoronoiQuantization1D(ABC):
         centroids: np.ndarray,
         nbr_iterations: int,
         num_warmup_iterations: int = 20,
+        workspace: Optional[OptimizationWorkspace] = None,
+        checkpoint: Optional[OptimizerCheckpoint] = None,
+        trace: Optional[TraceWriter] = None,
     ) -> Tuple[np.ndarray, np.ndarray, List[float]]:
         logger.info(
             "Start Newton–Raphson (warmup_lloyd={}, iterations={}, N={})",
@@ -169,17 +458,56 @@ class VoronoiQuantization1D(ABC):
             nbr_iterations,
             len(centroids),
         )
-        centroids, probas, distortions = self.deterministic_lloyd_method(centroids, num_warmup_iterations)
-        for i in range(nbr_iterations - num_warmup_iterations):
+        workspace = OptimizationWorkspace() if workspace is None else workspace
+        start = 0
+        parameters = self._checkpoint_parameters(
+            nbr_centroids=len(centroids), nbr_iterations=nbr_iterations, num_warmup_iterations=num_warmup_iterations
+        )
+
+        # Only the counts of this run are stored, they are added to those of the workspace when resuming
+        initial_sort_fallbacks, initial_rejected_steps = workspace.nbr_sort_fallbacks, workspace.nbr_rejected_steps
+
+        def checkpoint_state(iteration):
+            return dict(
+                centroids=centroids,
+                distortions=distortions,
+                iteration=iteration,
+                nbr_sort_fallbacks=workspace.nbr_sort_fallbacks - initial_sort_fallbacks,
+                nbr_rejected_steps=workspace.nbr_rejected_steps - initial_rejected_steps,
+            )
+
+        state = checkpoint.load("nr", parameters) if checkpoint is not None else None
+        if state is not None:
+            centroids, distortions, start = state["centroids"], list(state["distortions"]), int(state["iteration"])
+            workspace.nbr_sort_fallbacks += int(state["nbr_sort_fallbacks"])
+            workspace.nbr_rejected_steps += int(state["nbr_rejected_steps"])
+        else:
+            centroids, probas, distortions = self.deterministic_lloyd_method(
+                centroids, num_warmup_iterations, trace=trace
+            )
+        for i in range(start, nbr_iterations - num_warmup_iterations):
             hessian = self.hessian_distortion(centroids)
             gradient = self.gradient_distortion(centroids)
             inv_hessian_dot_grad = scipy.linalg.solve(hessian, gradient, assume_a="sym")
-            centroids = centroids - inv_hessian_dot_grad
-            centroids.sort()  # we sort the centroids because Newton-Raphson does not always preserve the order
+            # Newton-Raphson does not always preserve the order, hence the step is shortened when needed
+            centroids, sorted_ = self.order_preserving_update(centroids, -inv_hessian_dot_grad)
+            workspace.nbr_sort_fallbacks += sorted_
             distortions.append(self.distortion(centroids))
+            if trace is not None:
+                trace.append(len(distortions), distortions[-1], np.linalg.norm(gradient))
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save("nr", parameters, **checkpoint_state(i + 1))
+        if checkpoint is not None:
+            checkpoint.save("nr", parameters, **checkpoint_state(max(start, nbr_iterations - num_warmup_iterations)))
 
+        if trace is not None:
+            trace.flush()
         probabilities = self.cells_probability(self.get_vertices(centroids))
-        logger.info("End Newton–Raphson (final_distortion={})", distortions[-1] if distortions else None)
+        logger.info(
+            "End Newton–Raphson (final_distortion={}, sort_fallbacks={})",
+            distortions[-1] if distortions else None,
+            workspace.nbr_sort_fallbacks,
+        )
         return centroids, probabilities, distortions
 
     def newton_raphson_method_with_levenberg_marquardt(
@@ -189,6 +517,9 @@ class VoronoiQuantization1D(ABC):
         lambda_0: float = 1.0,
         num_warmup_iterations: int = 20,
         diagonal_term_type: Literal["identity", "hessian"] = "identity",
+        workspace: Optional[OptimizationWorkspace] = None,
+        checkpoint: Optional[OptimizerCheckpoint] = None,
+        trace: Optional[TraceWriter] = None,
     ) -> Tuple[np.ndarray, np.ndarray, List[float]]:
         logger.info(
             "Start NR+LM (warmup_lloyd={}, iterations={}, N={}, lambda_0={}, diagonal_term_type={})",
@@ -198,11 +529,43 @@ class VoronoiQuantization1D(ABC):
             lambda_0,
             diagonal_term_type,
         )
-        centroids, probas, distortions = self.deterministic_lloyd_method(centroids, num_warmup_iterations)
         lambda_ = lambda_0
-        current_distortion = self.distortion(centroids)
         max_inner = 10
-        for i in range(num_warmup_iterations, nbr_iterations):
+        workspace = OptimizationWorkspace() if workspace is None else workspace
+        start = num_warmup_iterations
+        parameters = self._checkpoint_parameters(
+            nbr_centroids=len(centroids),
+            nbr_iterations=nbr_iterations,
+            lambda_0=lambda_0,
+            num_warmup_iterations=num_warmup_iterations,
+            diagonal_term_type=diagonal_term_type,
+        )
+
+        # Only the counts of this run are stored, they are added to those of the workspace when resuming
+        initial_sort_fallbacks, initial_rejected_steps = workspace.nbr_sort_fallbacks, workspace.nbr_rejected_steps
+
+        def checkpoint_state(iteration):
+            return dict(
+                centroids=centroids,
+                distortions=distortions,
+                iteration=iteration,
+                lambda_=lambda_,
+                nbr_sort_fallbacks=workspace.nbr_sort_fallbacks - initial_sort_fallbacks,
+                nbr_rejected_steps=workspace.nbr_rejected_steps - initial_rejected_steps,
+            )
+
+        state = checkpoint.load("nrlm", parameters) if checkpoint is not None else None
+        if state is not None:
+            centroids, distortions, start = state["centroids"], list(state["distortions"]), int(state["iteration"])
+            workspace.nbr_sort_fallbacks += int(state["nbr_sort_fallbacks"])
+            workspace.nbr_rejected_steps += int(state["nbr_rejected_steps"])
+            lambda_ = float(state["lambda_"])
+        else:
+            centroids, probas, distortions = self.deterministic_lloyd_method(
+                centroids, num_warmup_iterations, trace=trace
+            )
+        current_distortion = self.distortion(centroids)
+        for i in range(start, nbr_iterations):
             hessian = self.hessian_distortion(centroids)
             gradient = self.gradient_distortion(centroids)
             improved = False
@@ -228,10 +591,10 @@ class VoronoiQuantization1D(ABC):
                     )
                     lambda_ = lambda_ * 10
                     continue
-                candidate_centroids = centroids - inv_hessian_dot_grad
-                candidate_centroids.sort()
+                candidate_centroids, sorted_ = self.order_preserving_update(centroids, -inv_hessian_dot_grad)
                 candidate_distortion = self.distortion(candidate_centroids)
                 if candidate_distortion < current_distortion:
+                    workspace.nbr_sort_fallbacks += sorted_
                     current_distortion = candidate_distortion
                     distortions.append(current_distortion)
                     centroids = candidate_centroids
@@ -240,6 +603,7 @@ class VoronoiQuantization1D(ABC):
                 lambda_ = lambda_ * 10
                 logger.info("NR+LM step {}/{}: no improvement, increasing lambda to {}", i + 1, nbr_iterations, lambda_)
             if not improved:
+                workspace.nbr_rejected_steps += 1
                 distortions.append(current_distortion)
                 logger.warning(
                     "NR+LM step {}/{}: no_improvement after {} tries (lambda_ ended at {})",
@@ -248,19 +612,276 @@ class VoronoiQuantization1D(ABC):
                     inner_tries,
                     lambda_,
                 )
+            if trace is not None:
+                trace.append(len(distortions), current_distortion, np.linalg.norm(gradient), lambda_)
             lambda_ = lambda_ * 0.1
             logger.info("NR+LM step {}/{}: decreasing lambda to {}", i + 1, nbr_iterations, lambda_)
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save("nrlm", parameters, **checkpoint_state(i + 1))
+        if checkpoint is not None:
+            checkpoint.save("nrlm", parameters, **checkpoint_state(max(start, nbr_iterations)))
+        if trace is not None:
+            trace.flush()
+        probabilities = self.cells_probability(self.get_vertices(centroids))
+        logger.info(
+            "End NR+LM (final_distortion={}, sort_fallbacks={})",
+            distortions[-1] if distortions else None,
+            workspace.nbr_sort_fallbacks,
+        )
+        return centroids, probabilities, distortions
+
+    def lbfgs_method(
+        self,
+        centroids: np.ndarray,
+        nbr_iterations: int,
+        memory_size: int = 10,
+        armijo_constant: float = 1e-4,
+        max_backtracking: int = 20,
+        fraction_to_boundary: float = 0.5,
+        gradient_tolerance: float = 0.0,
+        workspace: Optional[OptimizationWorkspace] = None,
+        checkpoint: Optional[OptimizerCheckpoint] = None,
+        trace: Optional[TraceWriter] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, List[float]]:
+        """Limited-memory BFGS using the Lloyd diagonal (the cells probabilities) as initial inverse Hessian.
+
+        Only `cells_probability` and `cells_expectation` are needed, the density is never evaluated. Hence the first
+        step is exactly a Lloyd step and the curvature pairs gathered along the way make the method superlinear.
+        Each step is globalized with a backtracking Armijo line search and consumes at most a fraction
+        `fraction_to_boundary` of any gap between adjacent centroids, so that repeated steps cannot collapse a gap.
+        The method stops before `nbr_iterations` once the norm of the gradient is at most `gradient_tolerance`, or when
+        the line search fails along the Lloyd direction (empty memory): the distortion can then no longer decrease in
+        floating point and every remaining iteration would repeat the same failed search.
+        """
+        logger.info(
+            "Start L-BFGS (N={}, iterations={}, memory_size={})",
+            len(centroids),
+            nbr_iterations,
+            memory_size,
+        )
+        distortions = []
+        workspace = OptimizationWorkspace() if workspace is None else workspace
+        s_history = deque(maxlen=memory_size)
+        y_history = deque(maxlen=memory_size)
+        start = 0
+        parameters = self._checkpoint_parameters(
+            nbr_centroids=len(centroids),
+            nbr_iterations=nbr_iterations,
+            memory_size=memory_size,
+            armijo_constant=armijo_constant,
+            max_backtracking=max_backtracking,
+            fraction_to_boundary=fraction_to_boundary,
+            gradient_tolerance=gradient_tolerance,
+        )
+
+        # Only the counts of this run are stored, they are added to those of the workspace when resuming
+        initial_sort_fallbacks, initial_rejected_steps = workspace.nbr_sort_fallbacks, workspace.nbr_rejected_steps
+
+        def checkpoint_state(iteration):
+            return dict(
+                centroids=centroids,
+                distortions=distortions,
+                iteration=iteration,
+                nbr_sort_fallbacks=workspace.nbr_sort_fallbacks - initial_sort_fallbacks,
+                nbr_rejected_steps=workspace.nbr_rejected_steps - initial_rejected_steps,
+                s_history=np.reshape(s_history, (len(s_history), len(centroids))),
+                y_history=np.reshape(y_history, (len(y_history), len(centroids))),
+            )
+
+        state = checkpoint.load("lbfgs", parameters) if checkpoint is not None else None
+        if state is not None:
+            centroids, distortions, start = state["centroids"], list(state["distortions"]), int(state["iteration"])
+            workspace.nbr_sort_fallbacks += int(state["nbr_sort_fallbacks"])
+            workspace.nbr_rejected_steps += int(state["nbr_rejected_steps"])
+            s_history.extend(state["s_history"])
+            y_history.extend(state["y_history"])
+        current_distortion, gradient, probabilities = self._distortion_gradient_and_probabilities(centroids)
+        for i in range(start, nbr_iterations):
+            gradient_norm = np.linalg.norm(gradient)
+            # Two-loop recursion with H_0^{-1} = diag(1 / p_i)
+            q = gradient.copy()
+            alphas = []
+            for s, y in zip(reversed(s_history), reversed(y_history)):
+                alpha = s.dot(q) / y.dot(s)
+                q -= alpha * y
+                alphas.append(alpha)
+            direction = q / probabilities
+            for (s, y), alpha in zip(zip(s_history, y_history), reversed(alphas)):
+                beta = y.dot(direction) / y.dot(s)
+                direction += (alpha - beta) * s
+            direction = -direction
+            if gradient.dot(direction) >= 0.0:
+                logger.info("L-BFGS step {}/{}: not a descent direction, resetting memory", i + 1, nbr_iterations)
+                s_history.clear()
+                y_history.clear()
+                direction = -gradient / probabilities
+
+            step = 1.0
+            accepted = False
+            for _ in range(max_backtracking):
+                candidate_centroids, sorted_ = self.order_preserving_update(
+                    centroids, step * direction, fraction_to_boundary=fraction_to_boundary
+                )
+                candidate = self._distortion_gradient_and_probabilities(candidate_centroids)
+                # The order preserving update may have shortened the step, hence the actual displacement is used
+                if candidate[0] <= current_distortion + armijo_constant * gradient.dot(candidate_centroids - centroids):
+                    accepted = True
+                    break
+                step *= 0.5
+            if accepted:
+                workspace.nbr_sort_fallbacks += sorted_
+                s = candidate_centroids - centroids
+                y = candidate[1] - gradient
+                # Only keep pairs satisfying the curvature condition so that the inverse Hessian stays positive definite
+                if y.dot(s) > 1e-12 * np.sqrt(y.dot(y) * s.dot(s)):
+                    s_history.append(s)
+                    y_history.append(y)
+                centroids = candidate_centroids
+                current_distortion, gradient, probabilities = candidate
+                converged = np.linalg.norm(gradient) <= gradient_tolerance
+            else:
+                workspace.nbr_rejected_steps += 1
+                converged = not s_history
+                if not converged:
+                    logger.warning("L-BFGS step {}/{}: line search failed, resetting memory", i + 1, nbr_iterations)
+                s_history.clear()
+                y_history.clear()
+            distortions.append(current_distortion)
+            if trace is not None:
+                trace.append(len(distortions), current_distortion, gradient_norm)
+            if converged:
+                logger.info("L-BFGS step {}/{}: converged, stopping", i + 1, nbr_iterations)
+                break
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save("lbfgs", parameters, **checkpoint_state(i + 1))
+        if checkpoint is not None:
+            checkpoint.save("lbfgs", parameters, **checkpoint_state(max(start, nbr_iterations)))
+        if trace is not None:
+            trace.flush()
+        logger.info(
+            "End L-BFGS (final_distortion={}, sort_fallbacks={})",
+            distortions[-1] if distortions else None,
+            workspace.nbr_sort_fallbacks,
+        )
+        return centroids, probabilities, distortions
+
+    def domain_decomposition_method(
+        self,
+        centroids: np.ndarray,
+        nbr_sweeps: int,
+        N: Optional[int] = None,
+        nbr_blocks: Optional[int] = None,
+        overlap: int = 8,
+        local_method: Literal["lloyd", "nr"] = "nr",
+        local_iterations: int = 2,
+        executor: Literal["thread", "process"] = "thread",
+        max_workers: Optional[int] = None,
+        workspace: Optional[OptimizationWorkspace] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, List[float]]:
+        """Block-decomposed solver for very large quantizers.
+
+        The sorted centroids are split into `nbr_blocks` contiguous blocks extended by `overlap` centroids on each side.
+        During a sweep, every extended block is optimized in parallel with `local_iterations` Lloyd or Newton-Raphson
+        (tridiagonal solve) iterations while the centroids just outside of it are kept fixed, then each block gives
+        back the centroids it owns. With threads, the work is done by NumPy/SciPy kernels that release the GIL.
+
+        If `N` is larger than the number of given centroids, a coarse-to-fine schedule is used: the quantizer is
+        optimized with `nbr_sweeps` sweeps, upsampled to twice its size (at most N) and so on until its size is N.
+
+        :return: the centroids, their probabilities and the distortion after each sweep of the finest level
+        """
+        N = len(centroids) if N is None else N
+        if N < len(centroids):
+            raise ValueError(f"N={N} should not be smaller than the number of given centroids ({len(centroids)})")
+        max_workers = max_workers or os.cpu_count()
+        nbr_blocks = nbr_blocks or max_workers
+        logger.info(
+            "Start domain decomposition (N={}, initial_N={}, sweeps={}, blocks={}, overlap={}, local_method={}, "
+            "executor={})",
+            N,
+            len(centroids),
+            nbr_sweeps,
+            nbr_blocks,
+            overlap,
+            local_method,
+            executor,
+        )
+        executor_class = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}[executor]
+        centroids = np.sort(centroids)
+        workspace = OptimizationWorkspace() if workspace is None else workspace
+        with executor_class(max_workers=max_workers) as pool:
+            while True:
+                distortions = []
+                blocks = np.array_split(np.arange(len(centroids)), min(nbr_blocks, len(centroids)))
+                for i in range(nbr_sweeps):
+                    starts = [max(block[0] - overlap, 0) for block in blocks]
+                    ends = [min(block[-1] + 1 + overlap, len(centroids)) for block in blocks]
+                    solved_blocks = pool.map(
+                        _solve_block,
+                        [self] * len(blocks),
+                        [centroids[max(start - 1, 0) : end + 1] for start, end in zip(starts, ends)],
+                        [start > 0 for start in starts],
+                        [end < len(centroids) for end in ends],
+                        [local_method] * len(blocks),
+                        [local_iterations] * len(blocks),
+                    )
+                    # Reconcile the interfaces: each block only gives back the centroids it owns
+                    centroids = np.concatenate(
+                        [
+                            solved[block[0] - start : block[-1] + 1 - start]
+                            for solved, block, start in zip(solved_blocks, blocks, starts)
+                        ]
+                    )
+                    if not np.all(centroids[1:] > centroids[:-1]):
+                        centroids.sort()
+                        workspace.nbr_sort_fallbacks += 1
+                    distortions.append(self.distortion(centroids))
+                logger.info(
+                    "Domain decomposition level N={} done (distortion={})",
+                    len(centroids),
+                    distortions[-1] if distortions else None,
+                )
+                if len(centroids) >= N:
+                    break
+                centroids = self.upsample_centroids(centroids, min(2 * len(centroids), N))
         probabilities = self.cells_probability(self.get_vertices(centroids))
-        logger.info("End NR+LM (final_distortion={})", distortions[-1] if distortions else None)
+        logger.info(
+            "End domain decomposition (final_distortion={}, sort_fallbacks={})",
+            distortions[-1] if distortions else None,
+            workspace.nbr_sort_fallbacks,
+        )
         return centroids, probabilities, distortions
 
-    def lr(
+    def greedy_quantization_sequence(
         self,
         N: int,
-        n: int,
-        max_iter: int,
-    ) -> float:
-        return 0.1
+        sequence: Optional[GreedyQuantizationSequence] = None,
+    ) -> GreedyQuantizationSequence:
+        """Build (or extend) a nested greedy quantization sequence up to N points, see `GreedyQuantizationSequence`.
+
+        :param N: size of the sequence to reach
+        :param sequence: previously built sequence to extend, a new one starting from the mean otherwise
+        :return: the sequence, whose prefixes of any size are quantizers
+        """
+        sequence = GreedyQuantizationSequence(self) if sequence is None else sequence
+        return sequence.extend(max(0, N - len(sequence)))
+
+    def _distortion_gradient_and_probabilities(
+        self,
+        centroids: np.ndarray,
+    ) -> Tuple[float, np.ndarray, np.ndarray]:
+        # Same quantities as `distortion` and `gradient_distortion` but sharing the cells computations
+        vertices = self.get_vertices(centroids)
+        mean_of_each_cell = self.cells_expectation(vertices)
+        proba_of_each_cell = self.cells_probability(vertices)
+        distortion = 0.5 * (
+            self.variance
+            + self.mean**2
+            - 2.0 * (centroids * mean_of_each_cell).sum()
+            + (centroids**2 * proba_of_each_cell).sum()
+        )
+        gradient = centroids * proba_of_each_cell - mean_of_each_cell
+        return distortion, gradient, proba_of_each_cell
 
     def cells_expectation(
         self,
@@ -268,11 +889,21 @@ class VoronoiQuantization1D(ABC):
     ) -> np.ndarray:
         """Compute the expectation of $X$ on each cell using the first partial moment function
 
+        Cells lying above the mean use differences of the upper partial moment instead, in order to avoid the
+        catastrophic cancellation of two first partial moments both close to the mean of $X$.
+
         :param vertices:
         :return: list of size N containing $\forall i \in \{ 1, \dots, N \}, \mathbb{E} (X \1_{X \in C_i (\Gamma_N) } )$
         """
-        first_partial_moment = self.fpm(vertices)
-        mean_on_each_cell = first_partial_moment[1:] - first_partial_moment[:-1]
+        split = max(np.searchsorted(vertices, self.mean, side="right"), 1)
+        first_partial_moment = self.fpm(vertices[:split])
+        upper_partial_moment = self.upper_partial_moment(vertices[split - 1 :])
+        mean_on_each_cell = np.concatenate(
+            (
+                first_partial_moment[1:] - first_partial_moment[:-1],
+                upper_partial_moment[:-1] - upper_partial_moment[1:],
+            )
+        )
         return mean_on_each_cell
 
     def cells_probability(
@@ -282,13 +913,86 @@ class VoronoiQuantization1D(ABC):
         """Compute the probabilities of $X$ on each cell using the cumulative distribution function (that are the
         probabilities of the quantizer $\widehat X^N$)
 
+        The probabilities are evaluated in log-space, from the log-CDF for cells lying below the mean and from the
+        log-survival function for cells lying above it, as
+        P(a < X <= b) = F(b) (1 - exp(log F(a) - log F(b))) = S(a) (1 - exp(log S(b) - log S(a))).
+        Hence tail cells keep a small relative error even when their probability is close to the machine precision.
+
         :param vertices:
         :return: list of size N containing $\forall i \in \{ 1, \dots, N \}, \mathbb{P} (X \in C_i (\Gamma_N) } )$
         """
-        cumulated_probability = self.cdf(vertices)
-        proba_of_each_cell = cumulated_probability[1:] - cumulated_probability[:-1]
+        split = max(np.searchsorted(vertices, self.mean, side="right"), 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_cdf = np.asarray(self.logcdf(vertices[:split]))
+            log_sf = np.asarray(self.logsf(vertices[split - 1 :]))
+            proba_of_each_cell = np.concatenate(
+                (
+                    -np.exp(log_cdf[1:]) * np.expm1(log_cdf[:-1] - log_cdf[1:]),
+                    -np.exp(log_sf[:-1]) * np.expm1(log_sf[1:] - log_sf[:-1]),
+                )
+            )
+        # Cells of probability zero (e.g. both bounds outside of the support) give nan through -inf - (-inf)
+        proba_of_each_cell[np.isnan(proba_of_each_cell)] = 0.0
         return proba_of_each_cell
 
+    # Generic tail functions, derived classes should override them when a formula without cancellation is available
+
+    def sf(
+        self,
+        x: Union[float, np.ndarray],
+    ) -> Union[float, np.ndarray]:
+        """Survival Function, x -> P(X > x)."""
+        return 1.0 - self.cdf(x)
+
+    def logcdf(
+        self,
+        x: Union[float, np.ndarray],
+    ) -> Union[float, np.ndarray]:
+        """Logarithm of the Cumulative Distribution Function, x -> log P(X <= x)."""
+        with np.errstate(divide="ignore"):
+            return np.log(self.cdf(x))
+
+    def logsf(
+        self,
+        x: Union[float, np.ndarray],
+    ) -> Union[float, np.ndarray]:
+        """Logarithm of the Survival Function, x -> log P(X > x)."""
+        with np.errstate(divide="ignore"):
+            return np.log(self.sf(x))
+
+    def upper_partial_moment(
+        self,
+        x: Union[float, np.ndarray],
+    ) -> Union[float, np.ndarray]:
+        """Upper Partial Moment, x -> E[X 1_{X > x}]."""
+        return self.mean - self.fpm(x)
+
+    def ppf(
+        self,
+        u: Union[float, np.ndarray],
+    ) -> Union[float, np.ndarray]:
+        """Percent Point Function (quantile function), u -> inf { x : P(X <= x) >= u } for u in (0, 1).
+
+        The default implementation inverts the CDF by a vectorized bisection, derived classes should override it when
+        a closed form is available.
+        """
+        u = np.asarray(u, dtype=float)
+        scale = np.sqrt(self.variance)
+        lower = np.full(u.shape, self.lower_bound_support if np.isfinite(self.lower_bound_support) else self.mean)
+        upper = np.full(u.shape, self.upper_bound_support if np.isfinite(self.upper_bound_support) else self.mean)
+        # Expand the brackets on the infinite sides of the support until they contain the quantiles
+        for i in range(64):
+            too_high, too_low = self.cdf(lower) > u, self.cdf(upper) < u
+            if not (too_high.any() or too_low.any()):
+                break
+            lower = np.where(too_high, lower - scale * 2.0**i, lower)
+            upper = np.where(too_low, upper + scale * 2.0**i, upper)
+        for _ in range(100):
+            middle = 0.5 * (lower + upper)
+            below = self.cdf(middle) < u
+            lower, upper = np.where(below, middle, lower), np.where(below, upper, middle)
+        return 0.5 * (lower + upper)
+
     @abstractmethod
     def pdf(
         self,
@@ -327,3 +1031,53 @@ class VoronoiQuantization1D(ABC):
         It needs be implemented in the derived class.
         """
         pass
+
+
+def _solve_block(
+    quantization: VoronoiQuantization1D,
+    centroids: np.ndarray,
+    has_lower_neighbour: bool,
+    has_upper_neighbour: bool,
+    local_method: Literal["lloyd", "nr"],
+    local_iterations: int,
+) -> np.ndarray:
+    """Optimize a block of centroids while the neighbours lying just outside of it are kept fixed.
+
+    Defined at the module level so that it can be sent to worker processes by `domain_decomposition_method`.
+
+    :param centroids: sorted centroids of the block, including the fixed neighbours when they exist
+    :return: the optimized centroids of the block, without the neighbours
+    """
+    lower = centroids[0] if has_lower_neighbour else None
+    upper = centroids[-1] if has_upper_neighbour else None
+    block = centroids[int(has_lower_neighbour) : len(centroids) - int(has_upper_neighbour)]
+    for _ in range(local_iterations):
+        # The vertices of the block cells, the outer ones depending on the fixed neighbours
+        extended = np.concatenate(
+            ([lower] if has_lower_neighbour else [], block, [upper] if has_upper_neighbour else [])
+        )
+        vertices = quantization.get_vertices(extended)
+        vertices = vertices[int(has_lower_neighbour) : len(vertices) - int(has_upper_neighbour)]
+        proba_of_each_cell = quantization.cells_probability(vertices)
+        mean_of_each_cell = quantization.cells_expectation(vertices)
+        if local_method == "lloyd":
+            block = mean_of_each_cell / proba_of_each_cell
+            continue
+        gradient = block * proba_of_each_cell - mean_of_each_cell
+        diagonal, off_diagonal = quantization._hessian_bands(
+            block,
+            vertices,
+            proba_of_each_cell,
+            lower_gap=block[0] - lower if has_lower_neighbour else 0.0,
+            upper_gap=upper - block[-1] if has_upper_neighbour else 0.0,
+        )
+        banded_hessian = np.zeros((2, len(block)))
+        banded_hessian[0, 1:] = off_diagonal
+        banded_hessian[1] = diagonal
+        try:
+            # Cholesky based solve: a Newton step is only taken where the Hessian is positive definite
+            direction = -scipy.linalg.solveh_banded(banded_hessian, gradient)
+        except (ValueError, np.linalg.LinAlgError):
+            direction = mean_of_each_cell / proba_of_each_cell - block
+        block, _ = quantization.order_preserving_update(block, direction, lower_bound=lower, upper_bound=upper)
+    return block
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class OptimizationWorkspace:
+    """Per-run scratch state of the optimizers of `VoronoiQuantization1D`.
+
+    The quantizers themselves are frozen and hold no state, so a single quantizer can be shared by concurrent runs,
+    each one with its own workspace. After a run, the workspace gives access to the diagnostics of the optimization.
+    Counters are accumulated if the same workspace is given to several runs, a resumed run adding the counts stored in
+    its checkpoint.
+    """
+
+    # Number of accepted steps for which the order preserving update had to fall back to a sort of the centroids, the
+    # trial steps rejected by a line search or a Levenberg-Marquardt damping are not counted
+    nbr_sort_fallbacks: int = 0
+    # Number of iterations that did not manage to decrease the distortion
+    nbr_rejected_steps: int = 0